@@ -14,13 +14,13 @@ PACKAGES=(
     hyprlock
     hyprpicker
     imagemagick
+    libcvc-git
     libnotify
     matugen-bin
     python-fabric-git
     python-pillow
     python-setproctitle
     python-toml
-    python-watchdog
     swww
     uwsm
     vte3
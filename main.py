@@ -1,3 +1,7 @@
+# Fork the thumbnail workers before any other import can start a thread
+from utils.thumbnailer import start_pool
+start_pool()
+
 import setproctitle
 import os
 import shutil  # New import
@@ -7,6 +11,7 @@ from modules.bar import Bar
 from modules.notch import Notch
 from modules.corners import Corners
 from config.config import open_config
+from utils import spawn_counter
 
 import gi
 gi.require_version("Gtk", "3.0")
@@ -44,6 +49,7 @@ def monitor_directory_recursive(directory, callback):
 
 if __name__ == "__main__":
     setproctitle.setproctitle("ax-shell")
+    spawn_counter.install()
     
     # Clear the cache directory
     cache_path = os.path.expanduser("~/.config/Ax-Shell/cache")
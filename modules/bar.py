@@ -6,7 +6,7 @@ from fabric.widgets.button import Button
 from fabric.widgets.wayland import WaylandWindow as Window
 from fabric.hyprland.widgets import Workspaces, WorkspaceButton, ActiveWindow  # Added ActiveWindow
 from fabric.utils.helpers import get_relative_path, exec_shell_command_async, FormattedString, truncate  # Added FormattedString and truncate
-from gi.repository import GLib, Gdk, Gtk
+from gi.repository import Gdk, Gtk
 from modules.systemtray import SystemTray
 from config.config import open_config
 import modules.icons as icons
@@ -14,6 +14,9 @@ import modules.data as data
 import subprocess
 import re
 from modules.window_title_widget import WINDOW_TITLE_MAP
+from services.audio import get_audio
+from services.brightness import get_brightness_service
+from utils.scroll_controller import ScrollController
 
 # New custom formatter for ActiveWindow
 class WindowFormatter:
@@ -117,10 +120,6 @@ class Bar(Window):
             ),
             h_expand=True,
         )
-        # Add scroll event mask to receive scroll events.
-        self.button_test_left.set_events(self.button_test_left.get_events() | Gdk.EventMask.SCROLL_MASK)
-        # Connect scroll-event to change brightness
-        self.button_test_left.connect("scroll-event", self.on_test_left_scroll)
         # Add gesture controller to support touchpad smooth scrolling
         self.gesture_left = Gtk.EventControllerScroll.new(
             self.button_test_left,
@@ -136,9 +135,6 @@ class Bar(Window):
             ),
             h_expand=True,
         )
-        # Add scroll event mask for volume control.
-        self.button_test_right.set_events(self.button_test_right.get_events() | Gdk.EventMask.SCROLL_MASK)
-        self.button_test_right.connect("scroll-event", self.on_test_right_scroll)
         self.gesture_right = Gtk.EventControllerScroll.new(
             self.button_test_right,
             Gtk.EventControllerScrollFlags.VERTICAL | Gtk.EventControllerScrollFlags.KINETIC
@@ -195,9 +191,21 @@ class Bar(Window):
 
         self.hidden = False
 
-        # Add scroll timers
-        self.last_scroll_time_left = 0
-        self.last_scroll_time_right = 0
+        # Scrolling over the left spacer changes brightness, over the right one volume
+        self.scroll_controller = ScrollController()
+        brightness = get_brightness_service()
+        audio = get_audio()
+        self.scroll_controller.attach(
+            self.button_test_left,
+            read=lambda: brightness.percentage,
+            write=lambda value: setattr(brightness, "percentage", value),
+        )
+        self.scroll_controller.attach(
+            self.button_test_right,
+            read=lambda: audio.volume,
+            write=lambda value: setattr(audio, "volume", value),
+            upper=150,  # the audio service allows amplification up to 150%
+        )
 
         self.show_all()
 
@@ -238,37 +246,3 @@ class Bar(Window):
             self.main_bar.add_style_class("hidden")
         else:
             self.main_bar.remove_style_class("hidden")
-
-    def on_test_left_scroll(self, widget, event):
-        current_time = GLib.get_monotonic_time()
-        # Add threshold of 100ms between scroll events
-        if current_time - self.last_scroll_time_left < 10000:  # 100000 microseconds = 100ms
-            return True
-        
-        self.last_scroll_time_left = current_time
-        
-        if event.direction in [Gdk.ScrollDirection.UP, Gdk.ScrollDirection.SMOOTH]:
-            success, dx, dy = event.get_scroll_deltas() if event.direction == Gdk.ScrollDirection.SMOOTH else (True, 0, -1)
-            if dy < 0:
-                exec_shell_command_async("brightnessctl set +5%")
-            elif dy > 0:
-                exec_shell_command_async("brightnessctl set 5%-")
-            
-        return False
-
-    def on_test_right_scroll(self, widget, event):
-        current_time = GLib.get_monotonic_time()
-        # Add threshold of 100ms between scroll events
-        if current_time - self.last_scroll_time_right < 10000:  # 100000 microseconds = 100ms
-            return True
-            
-        self.last_scroll_time_right = current_time
-        
-        if event.direction in [Gdk.ScrollDirection.UP, Gdk.ScrollDirection.SMOOTH]:
-            success, dx, dy = event.get_scroll_deltas() if event.direction == Gdk.ScrollDirection.SMOOTH else (True, 0, -1)
-            if dy < 0:
-                exec_shell_command_async("pactl set-sink-volume @DEFAULT_SINK@ +5%")
-            elif dy > 0:
-                exec_shell_command_async("pactl set-sink-volume @DEFAULT_SINK@ -5%")
-        
-        return False
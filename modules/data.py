@@ -12,5 +12,7 @@ if os.path.exists(json_config_path):
     with open(json_config_path, 'r') as f:
         config = json.load(f)
     WALLPAPERS_DIR = config.get('wallpapers_dir', default_wallpapers_dir)
+    OVERVIEW_PREVIEWS = config.get('overview_previews', False)
 else:
     WALLPAPERS_DIR = default_wallpapers_dir
+    OVERVIEW_PREVIEWS = False
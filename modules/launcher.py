@@ -1,13 +1,20 @@
-import operator
-from collections.abc import Iterator
+import math
 from fabric.widgets.box import Box
 from fabric.widgets.label import Label
 from fabric.widgets.button import Button
 from fabric.widgets.entry import Entry
 from fabric.widgets.scrolledwindow import ScrolledWindow
-from fabric.utils import DesktopApp, get_desktop_applications, idle_add, remove_handler
+from fabric.utils import DesktopApp
 from gi.repository import GLib, Gdk
 import modules.icons as icons
+from utils.app_search import AppSearchIndex
+from utils.launch_history import LaunchHistory
+
+# Results shown for a non-empty query
+MAX_RESULTS = 50
+# Row widgets created up front, what the 105 px results area fits with the
+# default padding. The pool is resized to the allocated height afterwards.
+ROW_POOL_SIZE = 2
 
 class AppLauncher(Box):
     def __init__(self, **kwargs):
@@ -19,12 +26,21 @@ class AppLauncher(Box):
         )
 
         self.notch = kwargs["notch"]
-        self.selected_index = -1  # Track the selected item index
+        self.selected_index = -1  # Track the selected item index, into self.results
+        self.results: list[DesktopApp] = []
+        self._offset = 0  # index of the result bound to the first row
 
-        self._arranger_handler: int = 0
-        self._all_apps = get_desktop_applications()
+        self.history = LaunchHistory()  # read on first use
+        # Built once, then kept current from the applications directories
+        self.search = AppSearchIndex(usage=self.history.score, frequent=self.history.top)
+        self.search.watch(on_changed=self.on_apps_changed)
 
+        # A fixed pool of rows rebound to whatever window of the results is shown,
+        # so typing never creates or destroys widgets
         self.viewport = Box(name="viewport", spacing=4, orientation="v")
+        self._rows: list[Button] = []
+        for _ in range(ROW_POOL_SIZE):
+            self._add_row()
         self.search_entry = Entry(
             name="search-entry",
             placeholder="Search Applications...",
@@ -41,6 +57,8 @@ class AppLauncher(Box):
             max_content_size=(450, 105),
             child=self.viewport,
         )
+        self.scrolled_window.connect("scroll-event", self.on_results_scroll)
+        self.scrolled_window.connect("size-allocate", self.on_results_allocate)
 
         self.header_box = Box(
             name="header_box",
@@ -74,55 +92,34 @@ class AppLauncher(Box):
         self.show_all()
 
     def close_launcher(self):
-        self.viewport.children = []
+        self.results = []
         self.selected_index = -1  # Reset selection
+        self.bind_rows()
         self.notch.close_notch()
 
     def open_launcher(self):
-        self._all_apps = get_desktop_applications()
         self.arrange_viewport()
 
-    def arrange_viewport(self, query: str = ""):
-        remove_handler(self._arranger_handler) if self._arranger_handler else None
-        self.viewport.children = []
-        self.selected_index = -1  # Clear selection when viewport changes
+    def on_apps_changed(self):
+        # Desktop entries were added or removed, refresh the results if they're shown
+        if self.get_mapped():
+            self.arrange_viewport(self.search_entry.get_text())
 
-        filtered_apps_iter = iter(
-            sorted(
-                [
-                    app
-                    for app in self._all_apps
-                    if query.casefold()
-                    in (
-                        (app.display_name or "")
-                        + (" " + app.name + " ")
-                        + (app.generic_name or "")
-                    ).casefold()
-                ],
-                key=lambda app: (app.display_name or "").casefold(),
-            )
-        )
-        should_resize = operator.length_hint(filtered_apps_iter) == len(self._all_apps)
+    @property
+    def last_search_ms(self) -> float:
+        """How long the last query took in the search index, in milliseconds."""
+        return self.search.last_query_ms
 
-        self._arranger_handler = idle_add(
-            lambda apps_iter: self.add_next_application(apps_iter) or self.handle_arrange_complete(should_resize, query),
-            filtered_apps_iter,
-            pin=True,
-        )
-
-    def handle_arrange_complete(self, should_resize, query):
-        if should_resize:
+    def arrange_viewport(self, query: str = ""):
+        self.results = self.search.query(query, limit=MAX_RESULTS)
+        self.selected_index = -1  # Clear selection when viewport changes
+        self._offset = 0
+        self.bind_rows()
+        if not query.strip():
             self.resize_viewport()
         # Only auto-select first item if query exists
-        if query.strip() != "" and self.viewport.get_children():
+        elif self.results:
             self.update_selection(0)
-        return False
-
-    def add_next_application(self, apps_iter: Iterator[DesktopApp]):
-        if not (app := next(apps_iter, None)):
-            return False
-        self.viewport.add(self.bake_application_slot(app))
-        return True
 
     def resize_viewport(self):
         self.scrolled_window.set_min_content_width(
@@ -130,69 +127,120 @@ class AppLauncher(Box):
         )
         return False
 
-    def bake_application_slot(self, app: DesktopApp, **kwargs) -> Button:
+    def bake_application_slot(self, **kwargs) -> Button:
+        label = Label(
+            name="app-label",
+            ellipsization="end",
+            v_align="center",
+            h_align="center",
+        )
         button = Button(
             name="app-slot-button",
             child=Box(
                 name="app-slot-box",
                 orientation="h",
                 spacing=10,
-                children=[
-                    Label(
-                        name="app-label",
-                        label=app.display_name or "Unknown",
-                        ellipsization="end",
-                        v_align="center",
-                        h_align="center",
-                    ),
-                ],
+                children=[label],
             ),
-            tooltip_text=app.description,
-            on_clicked=lambda *_: (app.launch(), self.close_launcher()),
+            on_clicked=lambda button: self.activate_row(button),
             **kwargs,
         )
+        button.app_label = label
+        button.app = None
         return button
 
+    def _add_row(self):
+        row = self.bake_application_slot()
+        self._rows.append(row)
+        self.viewport.add(row)
+
+    def bind_rows(self):
+        for i, row in enumerate(self._rows):
+            index = self._offset + i
+            app = self.results[index] if index < len(self.results) else None
+            context = row.get_style_context()
+            if index == self.selected_index:
+                context.add_class("selected")
+            else:
+                context.remove_class("selected")
+            if app is row.app:
+                continue
+            row.app = app
+            if app is None:
+                row.set_visible(False)
+                continue
+            row.app_label.set_label(app.display_name or "Unknown")
+            row.set_tooltip_text(app.description)
+            row.set_visible(True)
+
+    def on_results_allocate(self, widget, allocation):
+        # Keep exactly as many rows as fit whole, growing or shrinking with the
+        # area. Scrolling only moves the offset, so a partly clipped row could
+        # never be brought into view.
+        row_height = next((row.get_allocated_height() for row in self._rows if row.get_visible()), 0)
+        if row_height <= 1:
+            return
+        spacing = self.viewport.get_spacing()
+        fits = max(1, math.floor((allocation.height + spacing) / (row_height + spacing)))
+        if fits != len(self._rows):
+            GLib.idle_add(self._resize_pool, fits)
+
+    def _resize_pool(self, size: int):
+        while len(self._rows) < size:
+            self._add_row()
+        while len(self._rows) > size:
+            self._rows.pop().destroy()
+        # Keep the window of results inside the list and the selection in it
+        self._offset = max(0, min(self._offset, len(self.results) - len(self._rows)))
+        if self.selected_index >= 0:
+            self.scroll_to_selected()
+        self.bind_rows()
+        return False
+
+    def on_results_scroll(self, widget, event):
+        if event.direction == Gdk.ScrollDirection.UP:
+            delta = -1
+        elif event.direction == Gdk.ScrollDirection.DOWN:
+            delta = 1
+        elif event.direction == Gdk.ScrollDirection.SMOOTH:
+            _, dy = event.get_scroll_deltas()[1:]
+            delta = 1 if dy > 0 else -1 if dy < 0 else 0
+        else:
+            return False
+        self.scroll_results(self._offset + delta)
+        return True
+
+    def scroll_results(self, offset: int):
+        offset = max(0, min(offset, len(self.results) - len(self._rows)))
+        if offset != self._offset:
+            self._offset = offset
+            self.bind_rows()
+
+    def activate_row(self, row: Button):
+        if row.app is not None:
+            self.launch_app(row.app)
+            self.close_launcher()
+
+    def launch_app(self, app: DesktopApp):
+        app.launch()
+        desktop_id = self.search.desktop_id(app)
+        if desktop_id:
+            self.history.record(desktop_id)
+
     def update_selection(self, new_index: int):
-        # Unselect current
-        if self.selected_index != -1 and self.selected_index < len(self.viewport.get_children()):
-            current_button = self.viewport.get_children()[self.selected_index]
-            current_button.get_style_context().remove_class("selected")
-        # Select new
-        if new_index != -1 and new_index < len(self.viewport.get_children()):
-            new_button = self.viewport.get_children()[new_index]
-            new_button.get_style_context().add_class("selected")
+        if 0 <= new_index < len(self.results):
             self.selected_index = new_index
-            self.scroll_to_selected(new_button)
+            self.scroll_to_selected()
         else:
             self.selected_index = -1
+        self.bind_rows()
 
-    def scroll_to_selected(self, button):
-        def scroll():
-            adj = self.scrolled_window.get_vadjustment()
-            alloc = button.get_allocation()
-            if alloc.height == 0:
-                return False  # Retry if allocation isn't ready
-            
-            y = alloc.y
-            height = alloc.height
-            page_size = adj.get_page_size()
-            current_value = adj.get_value()
-            
-            # Calculate visible boundaries
-            visible_top = current_value
-            visible_bottom = current_value + page_size
-
-            if y < visible_top:
-                # Item above viewport - align to top
-                adj.set_value(y)
-            elif y + height > visible_bottom:
-                # Item below viewport - align to bottom
-                new_value = y + height - page_size
-                adj.set_value(new_value)
-            # No action if already fully visible
-            return False
-        GLib.idle_add(scroll)
+    def scroll_to_selected(self):
+        # Move the window of bound results just enough to show the selection
+        if self.selected_index < self._offset:
+            self._offset = self.selected_index
+        elif self.selected_index >= self._offset + len(self._rows):
+            self._offset = self.selected_index - len(self._rows) + 1
 
     def on_search_entry_activate(self, text):
         match text:
@@ -203,14 +251,14 @@ class AppLauncher(Box):
             case ":p":
                 self.notch.open_notch("power")
             case _:
-                children = self.viewport.get_children()
-                if children:
+                if self.results:
                     # Only activate if we have selection or non-empty query
                     if text.strip() == "" and self.selected_index == -1:
                         return  # Prevent accidental activation when empty
                     selected_index = self.selected_index if self.selected_index != -1 else 0
-                    if 0 <= selected_index < len(children):
-                        children[selected_index].clicked()
+                    if 0 <= selected_index < len(self.results):
+                        self.launch_app(self.results[selected_index])
+                        self.close_launcher()
 
     def on_search_entry_key_press(self, widget, event):
         keyval = event.keyval
@@ -226,13 +274,12 @@ class AppLauncher(Box):
         return False
 
     def move_selection(self, delta: int):
-        children = self.viewport.get_children()
-        if not children:
+        if not self.results:
             return
         # Allow starting selection from nothing when empty
         if self.selected_index == -1 and delta == 1:
             new_index = 0
         else:
             new_index = self.selected_index + delta
-        new_index = max(0, min(new_index, len(children) - 1))
+        new_index = max(0, min(new_index, len(self.results) - 1))
         self.update_selection(new_index)
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from os import truncate
+import os
 from fabric.widgets.box import Box
 from fabric.widgets.label import Label
 from fabric.widgets.centerbox import CenterBox
@@ -18,15 +18,15 @@ from modules.bluetooth import BluetoothConnections
 from modules.corners import MyCorner
 import modules.icons as icons
 import modules.data as data
-from modules.osd import OSDMenu, create_progress_bar
+from modules.osd import OSDMenu
 from fabric.widgets.eventbox import EventBox
 from fabric.widgets.button import Button
-import subprocess
 import requests
 import hashlib
 import random
 import cairo  # Added for image rounding
 from modules.player_notch import PlayerNotch  # New import
+from utils.scheduler import TickScheduler
 
 class Notch(Window):
     def __init__(self, **kwargs):
@@ -50,6 +50,12 @@ class Notch(Window):
         self.bluetooth = BluetoothConnections(notch=self)
         self.osd = OSDMenu(notch=self)
         
+        # Periodic work for the notch content, started once the widgets exist
+        self.scheduler = TickScheduler(active=False)
+
+        # Default waveform bar color (white), PlayerNotch swaps in the artwork's
+        self.average_color = (1, 1, 1)
+
         # Instantiate our new media stack component
         self.player_notch = PlayerNotch(parent=self)
         
@@ -57,7 +63,8 @@ class Notch(Window):
         self.info_media = self.player_notch.media_box
 
         # --- Info Widgets (Hostname, Media, Session) ---
-        self.info_hostname = Label(text="Loading...")
+        # Neither can change while the shell is running, so read them once
+        self.info_hostname = Label(text=self.get_hostname_info())
         self.info_session = Label(text=self.get_session_info())
         
         self.hostname_event = EventBox(
@@ -94,8 +101,6 @@ class Notch(Window):
         self.active_stack_eventbox.connect("enter-notify-event", self.on_active_stack_enter)
         self.active_stack_eventbox.connect("leave-notify-event", self.on_active_stack_leave)
 
-        GLib.idle_add(self.initial_hostname_update)
-
         # Main stack for all panels
         self.stack = Stack(
             name="notch-content",
@@ -116,11 +121,6 @@ class Notch(Window):
             ]
         )
         self.stack.set_visible_child(self.active_stack_eventbox)
-        self.average_color = (1, 1, 1)  # Default waveform bar color (white)
-        GLib.timeout_add(500, self.player_notch.refresh_media_info)
-        GLib.timeout_add(5000, self.refresh_hostname_info)
-        GLib.timeout_add(2000, self.refresh_session_info)
-        GLib.timeout_add(100, self.player_notch.animate_waveform)
 
         self.corner_left = Box(
             name="notch-corner-left",
@@ -154,6 +154,10 @@ class Notch(Window):
         self.add(self.event_box)
         self.hidden = False
 
+        self.stack.connect("notify::visible-child", lambda *_: self.scheduler.refresh())
+        self.active_stack.connect("notify::visible-child", lambda *_: self.scheduler.refresh())
+        self.scheduler.set_active(True)
+
         for widget in [self.launcher, self.dashboard, self.wallpapers, 
                        self.notification, self.overview, self.power, 
                        self.bluetooth, self.osd]:
@@ -309,6 +313,14 @@ class Notch(Window):
             self.notch_box.add_style_class("hidden")
         else:
             self.notch_box.remove_style_class("hidden")
+        self.scheduler.refresh()
+
+    def is_media_visible(self):
+        return (
+            not self.hidden
+            and self.stack.get_visible_child() == self.active_stack_eventbox
+            and self.active_stack.get_visible_child() == self.info_media
+        )
 
     def on_notch_scroll(self, widget, event):
         if self.stack.get_visible_child() != self.active_stack_eventbox:
@@ -339,7 +351,7 @@ class Notch(Window):
         return False
 
     def get_hostname_info(self):
-        import os, socket
+        import socket
         try:
             username = os.getenv('USER') or os.getlogin()
             hostname = socket.gethostname()
@@ -348,34 +360,8 @@ class Notch(Window):
             return "unknown@unknown"
 
     def get_session_info(self):
-        try:
-            desktop = subprocess.check_output(
-                ["echo $XDG_CURRENT_DESKTOP"],
-                shell=True,
-                encoding="utf-8"
-            ).strip()
-            return f"Session: {desktop}"
-        except Exception:
-            return "Session: Unknown"
-
-    def refresh_hostname_info(self):
-        hostname = self.get_hostname_info()
-        self.info_hostname.set_text(hostname)
-        if self.active_info_index == 0:
-            self.active_stack.set_visible_child(self.hostname_event)
-        return True
-
-    def refresh_session_info(self):
-        session = self.get_session_info()
-        self.info_session.set_text(session)
-        if self.active_info_index == 2:
-            self.active_stack.set_visible_child(self.session_event)
-        return True
-
-    def initial_hostname_update(self):
-        hostname = self.get_hostname_info()
-        self.info_hostname.set_text(hostname)
-        return False
+        desktop = os.environ.get("XDG_CURRENT_DESKTOP")
+        return f"Session: {desktop}" if desktop else "Session: Unknown"
 
 if __name__ == "__main__":
     notch = Notch()
@@ -1,5 +1,5 @@
-import os
-from gi.repository import GdkPixbuf, GLib, Gdk
+from collections import OrderedDict
+from gi.repository import GdkPixbuf, GLib, Gdk, Gtk
 from loguru import logger
 from widgets.rounded_image import CustomImage
 
@@ -14,6 +14,29 @@ from fabric.widgets.centerbox import CenterBox
 from fabric.widgets.image import Image
 from fabric.widgets.label import Label
 import modules.icons as icons
+from utils.image_loader import ImageLoader
+from utils.notification_history import NotificationHistory
+
+# Notifications shown at once, newer ones wait in the queue
+MAX_VISIBLE = 3
+# Waiting notifications beyond this drop the oldest
+MAX_QUEUED = 32
+# Minimum time between two notifications being put on screen
+PRESENT_INTERVAL_MS = 250
+# Size notification images and app icons are decoded at
+IMAGE_SIZE = 48
+
+image_loader = ImageLoader()
+_placeholder: GdkPixbuf.Pixbuf | None = None
+
+
+def get_placeholder() -> GdkPixbuf.Pixbuf:
+    """A transparent IMAGE_SIZE square shown until the real image is decoded."""
+    global _placeholder
+    if _placeholder is None:
+        _placeholder = GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, True, 8, IMAGE_SIZE, IMAGE_SIZE)
+        _placeholder.fill(0)
+    return _placeholder
 
 class ActionButton(Button):
     def __init__(self, action: NotificationAction, index: int, total: int, notification_box):
@@ -40,22 +63,36 @@ class ActionButton(Button):
 
 
 class NotificationBox(Box):
-    def __init__(self, notification: Notification, timeout_ms=3000, **kwargs):
+    def __init__(self, notification: Notification, timeout_ms=3000, count: int = 1, **kwargs):
         super().__init__(
             name="notification-box",
             # spacing=8,
             orientation="v",
-            children=[
-                # self.create_header(notification),
-                self.create_content(notification),
-                self.create_action_buttons(notification),
-            ],
         )
         self.notification = notification
+        self.count = count  # notifications from the same app folded into this box
+        self.children = [
+            # self.create_header(notification),
+            self.create_content(notification),
+            self.create_action_buttons(notification),
+        ]
         self.timeout_ms = timeout_ms
         self._timeout_id = None
         self.start_timeout()
 
+    def update(self, notification: Notification, count: int = 1):
+        """Show ``notification`` in this box instead, e.g. a replacement or a newer one from the same app."""
+        self.notification = notification
+        self.count = count
+        for child in self.get_children():
+            child.destroy()
+        self.children = [
+            self.create_content(notification),
+            self.create_action_buttons(notification),
+        ]
+        self.show_all()
+        self.start_timeout()
+
     def create_header(self, notification):
         app_icon = (
             Image(
@@ -95,13 +132,7 @@ class NotificationBox(Box):
             children=[
                 Box(
                     name="notification-image",
-                    children=CustomImage(
-                        pixbuf=notification.image_pixbuf.scale_simple(
-                            48, 48, GdkPixbuf.InterpType.BILINEAR
-                        ) if notification.image_pixbuf else self.get_pixbuf(
-                            notification.app_icon, 48, 48
-                        )
-                    ),
+                    children=self.create_image(notification),
                 ),
                 Box(
                     name="notification-text",
@@ -121,7 +152,8 @@ class NotificationBox(Box):
                                 ),
                                 Label(
                                     name="notification-app-name",
-                                    markup= " | " + notification.app_name,
+                                    markup= " | " + notification.app_name
+                                    + (f" ({self.count})" if self.count > 1 else ""),
                                     h_align="start",
                                     ellipsization="end",
                                 ),
@@ -145,20 +177,40 @@ class NotificationBox(Box):
             ],
         )
 
-    def get_pixbuf(self, icon_path, width, height):
-        if icon_path.startswith("file://"):
-            icon_path = icon_path[7:]
+    def create_image(self, notification):
+        # Decoding happens on the loader's workers, the placeholder keeps the
+        # layout in place until the result is handed back
+        image = CustomImage(pixbuf=get_placeholder())
+        self._image = image
 
-        if not os.path.exists(icon_path):
-            logger.warning(f"Icon path does not exist: {icon_path}")
-            return None
+        def on_loaded(pixbuf):
+            # The box may have been updated or closed in the meantime
+            if pixbuf is not None and self._image is image:
+                image.set_from_pixbuf(pixbuf)
+
+        if notification.image_pixbuf:
+            image_loader.scale(notification.image_pixbuf, IMAGE_SIZE, IMAGE_SIZE, on_loaded)
+            return image
+        path = self.get_icon_path(notification.app_icon)
+        if path:
+            pixbuf = image_loader.load_file(path, IMAGE_SIZE, IMAGE_SIZE, on_loaded)
+            if pixbuf is not None:
+                image.set_from_pixbuf(pixbuf)
+        return image
 
-        try:
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file(icon_path)
-            return pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
-        except Exception as e:
-            logger.error(f"Failed to load or scale icon: {e}")
+    def get_icon_path(self, app_icon: str) -> str | None:
+        """File behind a notification's app_icon, which is a path, a file:// URI or an icon name."""
+        if not app_icon:
             return None
+        if app_icon.startswith("file://"):
+            return app_icon[7:]
+        if app_icon.startswith("/"):
+            return app_icon
+        info = Gtk.IconTheme.get_default().lookup_icon(app_icon, IMAGE_SIZE, 0)
+        if info is None:
+            logger.warning(f"Icon not found in theme: {app_icon}")
+            return None
+        return info.get_filename()
 
     def create_action_buttons(self, notification):
         return Box(
@@ -203,6 +255,7 @@ class NotificationBox(Box):
 
     def destroy(self):
         self.stop_timeout()
+        self._image = None
         super().destroy()
 
     # @staticmethod
@@ -225,6 +278,12 @@ class NotificationContainer(Box):
     def __init__(self, **kwargs):
         super().__init__(name="notification", orientation="v", spacing=4, v_expand=True, h_expand=True)
         self.notch = kwargs["notch"]
+        self.history = NotificationHistory()
+        # Waiting, oldest first, each with how many notifications it stands for
+        self.queue: OrderedDict[int, tuple[Notification, int]] = OrderedDict()
+        self.boxes: dict[int, NotificationBox] = {}  # on screen, by notification id
+        self._present_id = None
+        self._last_present = 0
         self._server = Notifications()
         self._server.connect("notification-added", self.on_new_notification)
 
@@ -236,18 +295,89 @@ class NotificationContainer(Box):
             window.set_cursor(cursor)
 
     def on_new_notification(self, fabric_notif, id):
-        for child in self.get_children():
-            child.destroy()
         notification = fabric_notif.get_notification_from_id(id)
-        new_box = NotificationBox(notification)
-        self.add(new_box)
+        self.history.append(
+            notification.app_name,
+            notification.summary,
+            notification.body,
+            notification.app_icon,
+            notification.id,
+        )
         notification.connect("closed", self.on_notification_closed)
-        self.notch.open_notch("notification")
+
+        if id in self.boxes:
+            # Replacement of a notification on screen, refresh it in place
+            self.boxes[id].update(notification, self.boxes[id].count)
+            return
+        if id in self.queue:
+            self.queue[id] = (notification, self.queue[id][1])
+            return
+
+        same_app = next(
+            (box for box in self.boxes.values() if box.notification.app_name == notification.app_name),
+            None,
+        )
+        if same_app is not None:
+            # Bursts from one app fold into the box already showing it
+            previous = same_app.notification
+            del self.boxes[previous.id]
+            self.boxes[id] = same_app
+            same_app.update(notification, same_app.count + 1)
+            previous.close("expired")
+            return
+
+        count = 1
+        queued_id = next(
+            (
+                queued_id
+                for queued_id, (queued, _) in self.queue.items()
+                if queued.app_name == notification.app_name
+            ),
+            None,
+        )
+        if queued_id is not None:
+            # A burst that arrives before its first box is shown folds too
+            previous, count = self.queue.pop(queued_id)
+            count += 1
+            previous.close("expired")
+
+        self.queue[id] = (notification, count)
+        while len(self.queue) > MAX_QUEUED:
+            _, (dropped, _) = self.queue.popitem(last=False)
+            dropped.close("expired")
+        self._schedule_present()
+
+    def _schedule_present(self):
+        if self._present_id is not None or not self.queue or len(self.boxes) >= MAX_VISIBLE:
+            return
+        elapsed = (GLib.get_monotonic_time() - self._last_present) // 1000
+        self._present_id = GLib.timeout_add(max(0, PRESENT_INTERVAL_MS - elapsed), self._present_next)
+
+    def _present_next(self):
+        self._present_id = None
+        if self.queue and len(self.boxes) < MAX_VISIBLE:
+            id, (notification, count) = self.queue.popitem(last=False)
+            box = NotificationBox(notification, count=count)
+            self.boxes[id] = box
+            self.add(box)
+            self.reorder_child(box, 0)  # newest on top
+            box.show_all()
+            self._last_present = GLib.get_monotonic_time()
+            self.notch.open_notch("notification")
+        self._schedule_present()
+        return False
 
     def on_notification_closed(self, notification, reason):
+        logger.info(f"Notification {notification.id} closed with reason: {reason}")
+        self.queue.pop(notification.id, None)
+        box = self.boxes.get(notification.id)
+        if box is None or box.notification is not notification:
+            return  # already replaced, or never shown
+        del self.boxes[notification.id]
+        box.destroy()
+        if self.boxes or self.queue:
+            self._schedule_present()
+            return
         self.notch.close_notch()
         # Set cursor to default
         self.set_pointer_cursor(self, "arrow")
-        logger.info(f"Notification {notification.id} closed with reason: {reason}")
-        for child in self.get_children():
-            child.destroy()
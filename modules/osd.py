@@ -4,42 +4,10 @@ from fabric.widgets.button import Button
 from fabric.utils.helpers import exec_shell_command_async
 from gi.repository import GLib
 import modules.icons as icons
-import subprocess, re
 from fabric.widgets.eventbox import EventBox  # Add this import
-
-def create_progress_bar(percentage, width=150, height=None):
-    """Return a Box widget that looks like a progress bar"""
-    container = Box(orientation='v', name="progress-container", v_align="center")
-    style = f"min-width: {percentage * width / 100}px;"
-    bg_style = f"min-width: {width}px;"
-    
-    if height is not None:
-        style += f" min-height: {height}px; margin: 0;"
-        bg_style += f" min-height: {height}px; margin: 0;"
-    
-    progress = Box(name="progress-fill", style=style)
-    background = Box(name="progress-background", style=bg_style)
-    background.children = [progress]
-    container.children = [background]
-    return container
-
-def get_brightness():
-    try:
-        current = int(subprocess.check_output(["brightnessctl", "g"], encoding="utf-8").strip())
-        maximum = int(subprocess.check_output(["brightnessctl", "m"], encoding="utf-8").strip())
-        return int((current / maximum) * 100)
-    except Exception as e:
-        print("Error getting brightness:", e)
-    return None
-
-def get_volume_percentage():
-    try:
-        out = subprocess.check_output(["pactl", "get-sink-volume", "@DEFAULT_SINK@"], universal_newlines=True)
-        m = re.search(r"(\d+)%", out)
-        if m:
-            return int(m.group(1))
-    except Exception:
-        return None
+from services.audio import get_audio
+from services.brightness import get_brightness_service
+from widgets.progress_bar import ProgressBar
 
 class OSDMenu(Box):  # Change back to Box
     def __init__(self, **kwargs):
@@ -84,11 +52,11 @@ class OSDMenu(Box):  # Change back to Box
         
         # Volume section
         self.volume_label = Label(name="osd-label", markup="Volume: --%")
-        self.volume_progress = Box(name="osd-progress")
+        self.volume_progress = ProgressBar(size=(150, 8))
         
         # Brightness section
         self.brightness_label = Label(name="osd-label", markup="Brightness: --%")
-        self.brightness_progress = Box(name="osd-progress")
+        self.brightness_progress = ProgressBar(size=(150, 8))
 
         # Create containers
         self.volume_container = Box(
@@ -111,19 +79,23 @@ class OSDMenu(Box):  # Change back to Box
         self.event_area.add(self.inner_box)
         self.add(self.event_area)
 
+        # Volume is pushed by the audio service, None until it has connected
+        self.audio = get_audio()
+        self.last_volume = self.audio.volume if self.audio.ready else None
+        self.last_muted = self.audio.muted
         # Initialize state with current values
-        self.last_volume = get_volume_percentage() or 0  # Ensure we have a default value
-        self.displayed_brightness = get_brightness() or 0  # Ensure we have a default value
+        self.brightness = get_brightness_service()
+        self.displayed_brightness = self.brightness.percentage
         
         # Update displays immediately
-        self.volume_label.set_markup(f"Volume: {self.last_volume}%")
-        self.volume_progress.children = create_progress_bar(self.last_volume)
+        self.volume_label.set_markup(f"Volume: {self.last_volume or 0}%")
+        self.volume_progress.value = self.last_volume or 0
         self.brightness_label.set_markup(f"Brightness: {self.displayed_brightness}%")
-        self.brightness_progress.children = create_progress_bar(self.displayed_brightness)
+        self.brightness_progress.value = self.displayed_brightness
         
         # Setup monitoring
-        self._start_monitoring()
-        GLib.timeout_add(150, self._check_brightness)
+        self.audio.connect("changed", self._on_audio_changed)
+        self.brightness.connect("changed", lambda *_: self._check_changes())
 
         # Connect events
         self.event_area.connect('enter-notify-event', self._on_hover_enter)
@@ -134,13 +106,15 @@ class OSDMenu(Box):  # Change back to Box
         return True  # Consume the event, preventing focus.
 
     def update_volume(self, percentage):
-        self.volume_label.set_markup(f"Volume: {percentage}%")
-        self.volume_progress.children = create_progress_bar(percentage)
+        percentage = percentage or 0
+        muted = " (muted)" if self.audio.muted else ""
+        self.volume_label.set_markup(f"Volume: {percentage}%{muted}")
+        self.volume_progress.value = percentage
         self._reset_timeout()
 
     def update_brightness(self, percentage):
         self.brightness_label.set_markup(f"Brightness: {percentage}%")
-        self.brightness_progress.children = create_progress_bar(percentage)
+        self.brightness_progress.value = percentage
         self._reset_timeout()
 
     def _reset_timeout(self):
@@ -161,43 +135,29 @@ class OSDMenu(Box):  # Change back to Box
         self.notch.close_notch()
         return False
 
-    def _start_monitoring(self):
-        # Start pactl subscribe and attach a GLib IO watch to its stdout
-        self.subscribe_proc = subprocess.Popen(
-            ["pactl", "subscribe"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            encoding="utf-8",
-            universal_newlines=True,
-        )
-        if self.subscribe_proc.stdout:
-            GLib.io_add_watch(self.subscribe_proc.stdout, GLib.IO_IN, self._on_volume_event)
-
-    def _on_volume_event(self, source, condition):
-        line = source.readline()
-        if "sink" in line.lower():
-            self._check_changes()
-        return True
-
-    def _check_brightness(self):
-        current = get_brightness()
-        if current is not None:
-            self._check_changes()
-        return True
+    def _on_audio_changed(self, audio):
+        if self.last_volume is None:
+            # First value after connecting, nothing was changed by the user
+            self.last_volume = audio.volume
+            self.last_muted = audio.muted
+            self.volume_label.set_markup(f"Volume: {audio.volume}%")
+            self.volume_progress.value = audio.volume
+            return
+        self._check_changes()
 
     def _check_changes(self):
-        current_vol = get_volume_percentage()
-        current_bri = get_brightness()
-        
-        # Use existing values if new ones can't be fetched
-        if current_vol is None:
-            current_vol = self.last_volume
-        if current_bri is None:
-            current_bri = self.displayed_brightness
-            
+        current_vol = self.audio.volume if self.audio.ready else self.last_volume
+        current_muted = self.audio.muted
+        current_bri = self.brightness.percentage
+
         # Update if either value changed
-        if current_vol != self.last_volume or current_bri != self.displayed_brightness:
+        if (
+            current_vol != self.last_volume
+            or current_muted != self.last_muted
+            or current_bri != self.displayed_brightness
+        ):
             self.last_volume = current_vol
+            self.last_muted = current_muted
             self.displayed_brightness = current_bri
             self.notch.open_notch("osd")
             self.update_volume(current_vol)
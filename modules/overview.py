@@ -4,28 +4,43 @@ import json
 import cairo
 import gi
 from loguru import logger
-from fabric.hyprland.service import Hyprland
 from fabric.widgets.box import Box
 from fabric.widgets.button import Button
 from fabric.widgets.eventbox import EventBox
 from fabric.widgets.image import Image
 from fabric.widgets.label import Label
 from fabric.widgets.overlay import Overlay
+import modules.data as data
 import modules.icons as icons
 
 # WIP icon resolver (app_id to guessing the icon name)
-from utils.icon_resolver import IconResolver
+from utils.hyprland_monitor import HyprlandWithMonitors
+from utils.icon_resolver import get_icon_resolver
+from utils.window_capture import WindowCaptureCache
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import Gdk, Gtk
+from gi.repository import Gdk, GLib, Gtk
 
 screen = Gdk.Screen.get_default()
 CURRENT_WIDTH = screen.get_width()
 CURRENT_HEIGHT = screen.get_height()
 
-icon_resolver = IconResolver()
-connection = Hyprland()
+icon_resolver = get_icon_resolver()
+connection = HyprlandWithMonitors()
 SCALE = 0.1
+WORKSPACES = 10
+# Events arriving within one frame are applied together
+FRAME_MS = 16
+# Previews are captured this long after the overview closes or a window
+# changes while it is closed, which also lets the notch finish shrinking
+CAPTURE_DELAY_MS = 500
+
+
+def _overlaps(a: tuple, b: tuple) -> bool:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
 
 # Credit to Aylur for the drag and drop code
 TARGET = [Gtk.TargetEntry.new("text/plain", Gtk.TargetFlags.SAME_APP, 0)]
@@ -62,6 +77,7 @@ class HyprlandWindowButton(Button):
         self.app_id = app_id
         self.title = title
         self.window: Box = window
+        self.preview = None  # pixbuf shown through update_image, if any
 
         # Compute dynamic icon sizes based on the button size.
         # Using the minimum dimension of the button for scaling.
@@ -123,20 +139,19 @@ class HyprlandWindowButton(Button):
 
 class WorkspaceEventBox(EventBox):
     def __init__(self, workspace_id: int, fixed: Gtk.Fixed | None = None):
-        self.fixed = fixed
+        self.fixed = fixed or Gtk.Fixed.new()
+        self.empty_label = Label(
+            name="overview-add-label",
+            h_expand=True,
+            v_expand=True,
+            markup=icons.circle_plus,
+        )
         super().__init__(
             h_expand=True,
             v_expand=True,
             size=(int(CURRENT_WIDTH * SCALE), int(CURRENT_HEIGHT * SCALE)),
             name="overview-workspace-bg",
-            child=fixed
-            if fixed
-            else Label(
-                name="overview-add-label",
-                h_expand=True,
-                v_expand=True,
-                markup=icons.circle_plus,
-            ),
+            child=self.empty_label,
             on_drag_data_received=lambda _w, _c, _x, _y, data, *_: connection.send_command(
                 f"/dispatch movetoworkspacesilent {workspace_id},address:{data.get_data().decode()}"
             ),
@@ -146,85 +161,265 @@ class WorkspaceEventBox(EventBox):
             TARGET,
             Gdk.DragAction.COPY,
         )
-        if fixed:
-            fixed.show_all()
+        self.set_empty(not self.fixed.get_children())
 
+    def set_empty(self, empty: bool):
+        child = self.empty_label if empty else self.fixed
+        if self.get_child() is not child:
+            if self.get_child():
+                self.remove(self.get_child())
+            self.add(child)
+            child.show_all()
 
 
 class Overview(Box):
     def __init__(self, **kwargs):
         # Initialize as a Box instead of a PopupWindow.
         super().__init__(name="overview", orientation="v")
-        self.workspace_boxes: dict[int, Box] = {}
+        # The ten workspaces are built once, clients are added, moved and
+        # removed on them as Hyprland reports changes
+        self.workspace_boxes: dict[int, WorkspaceEventBox] = {}
         self.clients: dict[str, HyprlandWindowButton] = {}
+        # address -> the j/clients fields its button was last laid out from
+        self.client_state: dict[str, tuple] = {}
+        # address -> global (x, y, width, height), what a capture needs
+        self.client_geometry: dict[str, tuple] = {}
+        # Live window contents instead of bare icons, opt in from config.json
+        self.previews = WindowCaptureCache(SCALE) if data.OVERVIEW_PREVIEWS else None
+        self._pending_closed: set[str] = set()
+        self._needs_sync = True
+        self._flush_id = None
+        self._capture_id = None
+
+        self.children = [Box(), Box()]
+        for w_id in range(1, WORKSPACES + 1):
+            self.workspace_boxes[w_id] = WorkspaceEventBox(w_id)
+            overview_row = self.children[0] if w_id <= WORKSPACES // 2 else self.children[1]
+            overview_row.add(
+                Box(
+                    name="overview-workspace-box",
+                    orientation="vertical",
+                    children=[self.workspace_boxes[w_id]],
+                )
+            )
 
         connection.connect("event::openwindow", self.do_update)
-        connection.connect("event::closewindow", self.do_update)
+        connection.connect("event::closewindow", self.on_close_window)
         connection.connect("event::movewindow", self.do_update)
-        self.update()
+        connection.connect("event::monitoradded", self.on_monitors_changed)
+        connection.connect("event::monitorremoved", self.on_monitors_changed)
+        if self.previews:
+            connection.connect("event::windowtitle", self.on_window_title)
+            connection.connect("event::workspacev2", lambda *_: self.schedule_capture())
+        # Nothing is laid out while hidden, pending changes are applied on open
+        # unless a capture needs them first
+        self.connect("map", self.on_map)
+        self.connect("unmap", lambda *_: self.schedule_capture())
 
-    def update(self, signal_update=False):
-        # Remove old clients and workspaces.
-        for client in self.clients.values():
-            client.destroy()
-        self.clients.clear()
+    def on_map(self, *_):
+        if self._capture_id is not None:
+            GLib.source_remove(self._capture_id)
+            self._capture_id = None
+        self.schedule_flush()
 
-        for workspace in self.workspace_boxes.values():
-            workspace.destroy()
-        self.workspace_boxes.clear()
+    def do_update(self, *_):
+        logger.info(f"[Overview] Updating for :{_[1].name}")
+        self._needs_sync = True
+        self.schedule_flush()
+        self.schedule_capture()
 
-        # Create two rows in this Box.
-        self.children = [Box(), Box()]
+    def on_close_window(self, _, event):
+        # Removal needs no query, unless something else asked for a full sync
+        self._pending_closed.add(f"0x{event.data[0]}")
+        self.schedule_flush()
+        self.schedule_capture()
 
-        monitors = {
-            monitor["id"]: (monitor["x"], monitor["y"], monitor["transform"])
-            for monitor in json.loads(
-                connection.send_command("j/monitors").reply.decode()
+    def on_monitors_changed(self, *_):
+        self._needs_sync = True
+        self.schedule_flush()
+        self.schedule_capture()
+
+    def on_window_title(self, _, event):
+        # A new title is the cheapest hint that the contents changed
+        self.previews.invalidate(f"0x{event.data[0]}")
+        self.schedule_capture()
+
+    def schedule_flush(self):
+        # Coalesce a burst of events into one pass at the next frame
+        if not (self._needs_sync or self._pending_closed):
+            return
+        if self._flush_id is None and self.get_mapped():
+            self._flush_id = GLib.timeout_add(FRAME_MS, self._flush)
+
+    def _flush(self):
+        self._flush_id = None
+        if self.get_mapped():
+            self._apply_pending()
+        return False
+
+    def _apply_pending(self):
+        if self._needs_sync:
+            self._pending_closed.clear()
+            self._needs_sync = False
+            self.update()
+        else:
+            touched = set()
+            for address in self._pending_closed:
+                touched.add(self.client_state.get(address, (None,))[0])
+                self._remove_client(address)
+                self.client_geometry.pop(address, None)
+            self._pending_closed.clear()
+            self._refresh_empty(touched)
+
+    def schedule_capture(self):
+        # Captures are taken while the overview is closed: grim records the
+        # screen, with the overview open it would record the overview itself
+        if self.previews and self._capture_id is None and not self.get_mapped():
+            self._capture_id = GLib.timeout_add(CAPTURE_DELAY_MS, self._capture)
+
+    def _capture(self):
+        self._capture_id = None
+        if not self.get_mapped():
+            self._apply_pending()
+            self.refresh_previews()
+        return False
+
+    def refresh_previews(self):
+        """Request captures of the windows that are fully on screen right now.
+
+        Windows on other workspaces can't be captured and keep their last
+        preview, as do windows overlapping another window or the notch.
+        """
+        if not self.previews or not self.clients:
+            return
+        visible = {monitor["active_workspace"] for monitor in connection.get_monitors().values()}
+        shown = [address for address, state in self.client_state.items() if state[0] in visible]
+        covers = [self.client_geometry[address] for address in shown]
+        notch = self.get_notch_geometry()
+        if notch is not None:
+            covers.append(notch)
+        for i, address in enumerate(shown):
+            geometry = self.client_geometry[address]
+            if any(j != i and _overlaps(geometry, other) for j, other in enumerate(covers)):
+                continue
+            state = self.client_state[address]
+            self.previews.request(
+                address,
+                geometry,
+                self.clients[address].size,
+                state,
+                lambda pixbuf, address=address, state=state: self._on_preview(address, state, pixbuf),
             )
+
+    def get_notch_geometry(self) -> tuple[int, int, int, int] | None:
+        """Global (x, y, width, height) of the notch holding the overview, as it is now."""
+        window = self.get_toplevel()
+        if not isinstance(window, Gtk.Window) or window.get_window() is None:
+            return None
+        monitor = window.get_display().get_monitor_at_window(window.get_window())
+        if monitor is None:
+            return None
+        area = monitor.get_geometry()
+        width, height = window.get_allocated_width(), window.get_allocated_height()
+        # Anchored to the top center of its monitor
+        return (area.x + (area.width - width) // 2, area.y, width, height)
+
+    def _on_preview(self, address: str, state: tuple, pixbuf):
+        # Dropped if the window went away or was relaid out during the capture
+        if self.client_state.get(address) == state:
+            self.show_preview(self.clients[address], pixbuf)
+
+    def show_preview(self, button: HyprlandWindowButton, pixbuf):
+        if button.preview is not pixbuf:
+            button.preview = pixbuf
+            button.update_image(Image(pixbuf=pixbuf))
+
+    def update(self, signal_update=False):
+        """Reconcile the client buttons with a fresh j/clients snapshot."""
+        # Cached by the service until the monitor setup changes
+        monitors = {
+            monitor_id: (monitor["x"], monitor["y"], monitor["transform"])
+            for monitor_id, monitor in connection.get_monitors().items()
         }
 
+        seen = set()
+        touched = set()
         for client in json.loads(
             str(connection.send_command("j/clients").reply.decode())
         ):
-            # Exclude special workspaces.
-            if client["workspace"]["id"] > 0:
-                self.clients[client["address"]] = HyprlandWindowButton(
-                    window=self,
-                    title=client["title"],
-                    address=client["address"],
-                    app_id=client["initialClass"],
-                    size=(client["size"][0] * SCALE, client["size"][1] * SCALE),
-                    transform=monitors[client["monitor"]][2],
-                )
-                if client["workspace"]["id"] not in self.workspace_boxes:
-                    self.workspace_boxes[client["workspace"]["id"]] = Gtk.Fixed.new()
-                self.workspace_boxes[client["workspace"]["id"]].put(
-                    self.clients[client["address"]],
-                    abs(client["at"][0] - monitors[client["monitor"]][0]) * SCALE,
-                    abs(client["at"][1] - monitors[client["monitor"]][1]) * SCALE,
-                )
-
-        # Lay out workspaces into two rows.
-        for w_id in range(1, 11):
-            if w_id <= 5:
-                overview_row = self.children[0]
-            else:
-                overview_row = self.children[1]
-            overview_row.add(
-                Box(
-                    name="overview-workspace-box",
-                    orientation="vertical",
-                    children=[
-                        WorkspaceEventBox(
-                            w_id,
-                            self.workspace_boxes[w_id]
-                            if w_id in self.workspace_boxes
-                            else None,
-                        ),
-                    ],
-                )
+            workspace_id = client["workspace"]["id"]
+            # Exclude special workspaces and the ones not shown.
+            if workspace_id not in self.workspace_boxes or client["monitor"] not in monitors:
+                continue
+            address = client["address"]
+            monitor_x, monitor_y, transform = monitors[client["monitor"]]
+            state = (
+                workspace_id,
+                abs(client["at"][0] - monitor_x) * SCALE,
+                abs(client["at"][1] - monitor_y) * SCALE,
+                client["size"][0] * SCALE,
+                client["size"][1] * SCALE,
+                transform,
+                client["initialClass"],
+                client["title"],
             )
+            seen.add(address)
+            self.client_geometry[address] = (*client["at"], *client["size"])
+            old = self.client_state.get(address)
+            if old == state:
+                continue
+            touched.add(workspace_id)
+            if old is not None:
+                touched.add(old[0])
+            if old is None or old[3:7] != state[3:7]:
+                # Size, rotation and icon are baked into the button
+                self._remove_client(address)
+                self._add_client(address, state)
+            else:
+                button = self.clients[address]
+                if old[0] != workspace_id:
+                    self.workspace_boxes[old[0]].fixed.remove(button)
+                    self.workspace_boxes[workspace_id].fixed.put(button, state[1], state[2])
+                elif old[1:3] != state[1:3]:
+                    self.workspace_boxes[workspace_id].fixed.move(button, state[1], state[2])
+                if old[7] != state[7]:
+                    button.title = state[7]
+                    button.set_tooltip_text(state[7])
+                self.client_state[address] = state
 
-    def do_update(self, *_):
-        logger.info(f"[Overview] Updating for :{_[1].name}")
-        self.update(signal_update=True)
+        for address in set(self.clients) - seen:
+            touched.add(self.client_state[address][0])
+            self._remove_client(address)
+            self.client_geometry.pop(address, None)
+        self._refresh_empty(touched)
+
+    def _add_client(self, address: str, state: tuple):
+        workspace_id, x, y, width, height, transform, app_id, title = state
+        button = HyprlandWindowButton(
+            window=self,
+            title=title,
+            address=address,
+            app_id=app_id,
+            size=(width, height),
+            transform=transform,
+        )
+        self.clients[address] = button
+        self.client_state[address] = state
+        self.workspace_boxes[workspace_id].fixed.put(button, x, y)
+        if self.previews and (pixbuf := self.previews.cached(address, state)):
+            self.show_preview(button, pixbuf)
+        button.show_all()
+
+    def _remove_client(self, address: str):
+        button = self.clients.pop(address, None)
+        self.client_state.pop(address, None)
+        if self.previews:
+            self.previews.discard(address)
+        if button is not None:
+            button.destroy()
+
+    def _refresh_empty(self, workspace_ids):
+        for w_id in workspace_ids:
+            if w_id in self.workspace_boxes:
+                box = self.workspace_boxes[w_id]
+                box.set_empty(not box.fixed.get_children())
@@ -6,8 +6,6 @@ import subprocess
 import json
 import cairo
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 
 from fabric.widgets.box import Box
 from fabric.widgets.label import Label
@@ -32,36 +30,6 @@ def open_file(filepath):
     except Exception as e:
         print("Error opening file:", e)
 
-class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, app):
-        self.app = app
-
-    def on_any_event(self, event):
-        if event.is_directory:
-            return
-
-        for cell in self.app.cells:
-            if cell.content_type == 'file' and cell.content:
-                try:
-                    cell_real = os.path.realpath(cell.content)
-                    src_real = os.path.realpath(event.src_path)
-                    dest_real = os.path.realpath(getattr(event, 'dest_path', ''))
-                    if cell_real == src_real or (dest_real and cell_real == dest_real):
-                        GLib.idle_add(self.handle_file_event, cell, event)
-                except Exception:
-                    pass
-
-    def handle_file_event(self, cell, event):
-        if event.event_type == 'deleted':
-            cell.clear_cell()
-            self.app.save_state()
-        elif event.event_type == 'moved':
-            if hasattr(event, 'dest_path') and os.path.exists(event.dest_path):
-                cell.content = event.dest_path
-                cell.update_display()
-                self.app.save_state()
-                self.app.add_monitor_for_path(os.path.dirname(event.dest_path))
-
 class Cell(Gtk.EventBox):
     def __init__(self, app, content=None, content_type=None):
         super().__init__(name="pin-cell")
@@ -104,6 +72,7 @@ class Cell(Gtk.EventBox):
                 label = Label(name="pin-text", label=self.content.split('\n')[0], justification="center", ellipsization="end", line_wrap="word-char")
                 self.box.pack_start(label, True, True, 0)
         self.box.show_all()
+        self.app.update_watch(self)
         if not self.app.loading_state:
             self.app.save_state()
 
@@ -216,9 +185,11 @@ class Pins(Gtk.Box):
         super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=0)
 
         self.loading_state = True
-        self.monitored_paths = set()
-        self.observer = Observer()
-        self.event_handler = FileChangeHandler(self)
+        # realpath of a pinned file -> (its monitor, cells pinning it). Each
+        # monitor watches only its own file and reports which path it
+        # belongs to, so an event never has to be matched against the cells.
+        self.watches: dict[str, tuple[Gio.FileMonitor, list[Cell]]] = {}
+        self.watched_paths: dict[Cell, str] = {}
 
         self.cells = []
         grid = Gtk.Grid(row_spacing=10, column_spacing=10)
@@ -235,24 +206,47 @@ class Pins(Gtk.Box):
 
         self.load_state()
         self.loading_state = False
-        self.start_file_monitoring()
 
         self.drag_dest_set(Gtk.DestDefaults.ALL, [], Gdk.DragAction.COPY)
         self.connect("drag-data-received", self.on_drag_data_received)
 
-    def start_file_monitoring(self):
-        for cell in self.cells:
-            if cell.content_type == 'file' and cell.content:
-                dir_path = os.path.dirname(cell.content)
-                if os.path.exists(dir_path) and dir_path not in self.monitored_paths:
-                    self.observer.schedule(self.event_handler, dir_path, recursive=False)
-                    self.monitored_paths.add(dir_path)
-        self.observer.start()
-
-    def add_monitor_for_path(self, path):
-        if path not in self.monitored_paths and os.path.exists(path):
-            self.observer.schedule(self.event_handler, path, recursive=False)
-            self.monitored_paths.add(path)
+    def update_watch(self, cell):
+        """Watch the file ``cell`` now pins, dropping the watch on what it pinned before."""
+        path = None
+        if cell.content_type == 'file' and cell.content:
+            path = os.path.realpath(cell.content)
+        old_path = self.watched_paths.get(cell)
+        if path == old_path:
+            return
+        if old_path is not None:
+            del self.watched_paths[cell]
+            monitor, cells = self.watches[old_path]
+            cells.remove(cell)
+            if not cells:
+                monitor.cancel()
+                del self.watches[old_path]
+        if path is None:
+            return
+        self.watched_paths[cell] = path
+        if path in self.watches:
+            self.watches[path][1].append(cell)
+            return
+        monitor = Gio.File.new_for_path(path).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        monitor.connect("changed", self.on_file_changed, path)
+        self.watches[path] = (monitor, [cell])
+
+    def on_file_changed(self, monitor, file, other_file, event_type, path):
+        watch = self.watches.get(path)
+        if watch is None or watch[0] is not monitor:
+            return
+        if event_type == Gio.FileMonitorEvent.RENAMED and other_file is not None:
+            # Renamed within its directory, follow it
+            for cell in list(watch[1]):
+                cell.content = other_file.get_path()
+                cell.update_display()
+        elif event_type in (Gio.FileMonitorEvent.DELETED, Gio.FileMonitorEvent.MOVED_OUT):
+            for cell in list(watch[1]):
+                cell.clear_cell()
 
     def save_state(self):
         state = []
@@ -300,5 +294,7 @@ class Pins(Gtk.Box):
         drag_context.finish(True, False, time)
 
     def stop_monitoring(self):
-        self.observer.stop()
-        self.observer.join()
+        for monitor, _ in self.watches.values():
+            monitor.cancel()
+        self.watches.clear()
+        self.watched_paths.clear()
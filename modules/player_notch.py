@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
-import subprocess, random, hashlib, requests
+import random
 from gi.repository import GLib, Gdk, Gtk, GdkPixbuf
-import cairo
 from fabric.widgets.box import Box
 from fabric.widgets.label import Label
 from fabric.widgets.centerbox import CenterBox
 from fabric.widgets.revealer import Revealer
 from fabric.widgets.eventbox import EventBox
 from fabric.widgets.button import Button
-from modules.osd import OSDMenu, create_progress_bar
+from modules.osd import OSDMenu
+from widgets.progress_bar import ProgressBar
+from services.mpris import MprisPlayerManager, MprisPlayer
+from utils.art_cache import ArtCache
+from utils.colors import get_average_color
 import modules.icons as icons
 
+# The notch follows this player when it is around, otherwise the first one.
+PREFERRED_PLAYER = "spotify"
+
 def get_player_icon_markup_by_name(player_name):
     if player_name:
         pn = player_name.lower()
@@ -95,7 +101,7 @@ class PlayerNotch:
         ]
         
         self.media_progress_box = Box(orientation="h", spacing=4, v_align="center", h_align="center", name="media-progress-box")
-        self.media_progress = Box()
+        self.media_progress = ProgressBar(size=(200, 5))
         self.media_progress_eventbox = EventBox(child=self.media_progress)
         self.media_progress_eventbox.set_events(
             Gdk.EventMask.BUTTON_PRESS_MASK |
@@ -130,11 +136,33 @@ class PlayerNotch:
         self.full_pixbuf = None
         self.scaled_pixbufs = {}
         self.current_track_length = 0
+        self.current_art_url = None
+        self.art_cache = ArtCache(size=64, variant_sizes=(32,))
         self.is_dragging_progress = False
 
-        # Setup periodic media updates
-        GLib.timeout_add(500, self.refresh_media_info)
-        GLib.timeout_add(100, self.animate_waveform)
+        # Position is interpolated locally from the last known anchor,
+        # mpris only tells us about seeks and play/pause transitions.
+        self.position_anchor = 0.0
+        self.position_anchor_time = 0
+        self.is_playing = False
+
+        self.mpris_player = None
+        self._player_handlers = []
+        self.mpris_manager = MprisPlayerManager()
+        self.mpris_manager.connect("player-appeared", self.on_player_appeared)
+        self.mpris_manager.connect("player-vanished", self.on_player_vanished)
+        self.select_player()
+
+        # Both only tick while the media view is actually on screen
+        scheduler = self.parent.scheduler
+        scheduler.subscribe(
+            self.animate_waveform, 100,
+            when=lambda: self.is_animating and self.parent.is_media_visible(),
+        )
+        scheduler.subscribe(
+            self.on_position_tick, 500,
+            when=lambda: self.is_playing and self.parent.is_media_visible(),
+        )
 
     # --- Media-Related Methods ---
     def on_track_image_draw(self, widget, cr):
@@ -180,7 +208,7 @@ class PlayerNotch:
         GLib.timeout_add(step_duration, update_size)
 
     def draw_waveform(self, widget, cr):
-        cr.set_source_rgb(*self.get_average_color(self.full_pixbuf) if self.full_pixbuf else (1,1,1))
+        cr.set_source_rgb(*self.parent.average_color)
         bar_width = 2
         spacing = 2
         total_width = 2 * bar_width + 4 * spacing
@@ -212,37 +240,17 @@ class PlayerNotch:
         return True
 
     def on_media_button_clicked(self, _):
-        try:
-            subprocess.Popen(["playerctl", "--player=spotify", "play-pause"])
-            status = subprocess.check_output(
-                ["playerctl", "--player=spotify", "status"],
-                encoding="utf-8"
-            ).strip().lower()
-            if status == "playing":
-                self.media_button.set_image(self.pause_icon)
-                self.is_animating = True
-            else:
-                self.media_button.set_image(self.play_icon)
-                self.is_animating = False
-                self.bar_heights = [0, 0, 0, 0, 0]
-                self.waveform.queue_draw()
-        except Exception as e:
-            print("Error executing playerctl command:", e)
-            self.is_animating = False
-            self.bar_heights = [0, 0, 0, 0, 0]
-            self.waveform.queue_draw()
+        # The icon follows the playback-status signal, no need to poll it here.
+        if self.mpris_player:
+            self.mpris_player.play_pause()
 
     def on_media_previous_clicked(self, _):
-        try:
-            subprocess.Popen(["playerctl", "--player=spotify", "previous"])
-        except Exception as e:
-            print("Error executing previous command:", e)
-    
+        if self.mpris_player:
+            self.mpris_player.previous()
+
     def on_media_next_clicked(self, _):
-        try:
-            subprocess.Popen(["playerctl", "--player=spotify", "next"])
-        except Exception as e:
-            print("Error executing next command:", e)
+        if self.mpris_player:
+            self.mpris_player.next()
 
     def on_progress_press(self, widget, event):
         self.is_dragging_progress = True
@@ -263,144 +271,183 @@ class PlayerNotch:
         allocation = widget.get_allocation()
         width = allocation.width if allocation.width > 0 else 1
         new_percentage = min(max(event.x / width, 0), 1)
-        self.media_progress.children = [create_progress_bar(new_percentage * 100, width=200, height=5)]
-        if seek:
+        self.media_progress.value = new_percentage * 100
+        if seek and self.mpris_player:
+            position = new_percentage * self.current_track_length
             try:
-                subprocess.Popen(["playerctl", "--player=spotify", "position", str(new_percentage * self.current_track_length)])
+                self.mpris_player.position = int(position * 1000000)
+                self.set_position_anchor(position)
             except Exception as e:
                 print("Error seeking track:", e)
 
-    def get_average_color(self, pixbuf):
-        if not pixbuf:
-            return (1, 1, 1)
-        pixels = pixbuf.get_pixels()
-        width = pixbuf.get_width()
-        height = pixbuf.get_height()
-        n_channels = pixbuf.get_n_channels()
-        rowstride = pixbuf.get_rowstride()
-        total_r = total_g = total_b = count = 0
-        for y in range(height):
-            for x in range(width):
-                offset = y * rowstride + x * n_channels
-                r = pixels[offset]
-                g = pixels[offset + 1]
-                b = pixels[offset + 2]
-                if pixbuf.get_has_alpha():
-                    a = pixels[offset + 3]
-                    if a > 0:
-                        total_r += r
-                        total_g += g
-                        total_b += b
-                        count += 1
-                else:
-                    total_r += r
-                    total_g += g
-                    total_b += b
-                    count += 1
-        if count:
-            return (total_r/count/255.0, total_g/count/255.0, total_b/count/255.0)
-        return (1, 1, 1)
-
-    def create_rounded_pixbuf(self, pixbuf):
-        size = min(pixbuf.get_width(), pixbuf.get_height())
-        radius = 10
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
-        cr = cairo.Context(surface)
-        cr.move_to(radius, 0)
-        cr.arc(size - radius, radius, radius, -90 * (3.14159 / 180), 0)
-        cr.arc(size - radius, size - radius, radius, 0, 90 * (3.14159 / 180))
-        cr.arc(radius, size - radius, radius, 90 * (3.14159 / 180), 180 * (3.14159 / 180))
-        cr.arc(radius, radius, radius, 180 * (3.14159 / 180), 270 * (3.14159 / 180))
-        cr.close_path()
-        cr.clip()
-        Gdk.cairo_set_source_pixbuf(cr, pixbuf, 0, 0)
-        cr.paint()
-        return Gdk.pixbuf_get_from_surface(surface, 0, 0, size, size)
-
-    def get_cached_image(self, art_url):
-        import os
-        cache_dir = "/home/gunit/.config/Ax-Shell/cache"
-        if not os.path.exists(cache_dir):
-            os.makedirs(cache_dir)
-        hash_name = hashlib.md5(art_url.encode("utf-8")).hexdigest() + ".png"
-        file_path = os.path.join(cache_dir, hash_name)
-        if not os.path.exists(file_path):
-            try:
-                response = requests.get(art_url)
-                if response.status_code == 200:
-                    with open(file_path, "wb") as f:
-                        f.write(response.content)
-            except Exception:
-                return None
-        return file_path
+    # --- MPRIS Player Tracking ---
+    def select_player(self, exclude=None):
+        players = [
+            p for p in (self.mpris_manager.players or [])
+            if p.get_property("player-name") != exclude
+        ]
+        preferred = next(
+            (p for p in players if p.get_property("player-name") == PREFERRED_PLAYER),
+            players[0] if players else None,
+        )
+        if self.mpris_player and preferred and (
+            self.mpris_player.player_name == preferred.get_property("player-name")
+        ):
+            return
+        self.bind_player(preferred)
 
-    def refresh_media_info(self):
+    def bind_player(self, player):
+        self.unbind_player()
+        if player is None:
+            self.show_no_track()
+            return
+        self.mpris_player = MprisPlayer(player)
+        self._player_handlers = [
+            self.mpris_player.connect("notify::metadata", lambda *_: self.on_metadata_changed()),
+            self.mpris_player.connect("notify::playback-status", lambda *_: self.on_playback_status_changed()),
+            self.mpris_player.connect("seeked", self.on_seeked),
+        ]
+        self.switcher_label.set_markup(get_player_icon_markup_by_name(self.mpris_player.player_name))
+        self.refresh_media_info()
+
+    def unbind_player(self):
+        if self.mpris_player:
+            for handler_id in self._player_handlers:
+                try:
+                    self.mpris_player.disconnect(handler_id)
+                except Exception:
+                    pass
+            # Otherwise the Playerctl player keeps driving the old wrapper
+            self.mpris_player.release()
+        self._player_handlers = []
+        self.mpris_player = None
+        self.is_playing = False
+        self.is_animating = False
+        self.parent.scheduler.refresh()
+
+    def on_player_appeared(self, manager, player):
+        if (not self.mpris_player
+                or player.get_property("player-name") == PREFERRED_PLAYER):
+            self.select_player()
+
+    def on_player_vanished(self, manager, player_name):
+        if self.mpris_player and self.mpris_player.player_name == player_name:
+            self.unbind_player()
+            self.select_player(exclude=player_name)
+
+    def on_metadata_changed(self):
+        if not self.mpris_player:
+            return
         try:
-            title = subprocess.check_output(
-                ["playerctl", "--player=spotify", "metadata", "title"],
-                encoding="utf-8"
-            ).strip()
-            position = float(subprocess.check_output(
-                ["playerctl", "--player=spotify", "position"],
-                encoding="utf-8"
-            ).strip())
-            length = float(subprocess.check_output(
-                ["playerctl", "--player=spotify", "metadata", "mpris:length"],
-                encoding="utf-8"
-            ).strip()) / 1000000
-            progress_percentage = (position / length) * 100 if length > 0 else 0
-            self.current_track_length = length
-            if len(title) > 20:
-                title = title[:20] + "..."
-            cur_m = int((position % 3600) // 60)
-            cur_s = int(position % 60)
-            tot_m = int((length % 3600) // 60)
-            tot_s = int(length % 60)
-            current = f"{cur_m}:{cur_s:02d}"
-            total = f"{tot_m}:{tot_s:02d}"
-            self.media_title.set_text(title)
-            self.media_current_time.set_text(current)
-            self.media_time.set_text(total)
-            if not self.is_dragging_progress:
-                self.media_progress.children = [create_progress_bar(progress_percentage, width=200, height=5)]
-            try:
-                art_url = subprocess.check_output(
-                    ["playerctl", "--player=spotify", "metadata", "mpris:artUrl"],
-                    encoding="utf-8"
-                ).strip()
-                if art_url:
-                    if art_url.startswith("file://"):
-                        file_path = art_url.replace("file://", "")
-                    else:
-                        file_path = self.get_cached_image(art_url)
-                    if file_path:
-                        original_pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(file_path, 64, 64, True)
-                        rounded_pixbuf = self.create_rounded_pixbuf(original_pixbuf)
-                        self.full_pixbuf = rounded_pixbuf
-                        self.scaled_pixbufs = {}
-                        self.track_image.set_size_request(self.current_track_size, self.current_track_size)
-                        self.track_image.queue_draw()
-            except Exception:
-                pass
-            status = subprocess.check_output(
-                ["playerctl", "--player=spotify", "status"],
-                encoding="utf-8"
-            ).strip().lower()
-            if status == "playing":
-                self.media_button.set_image(self.pause_icon)
-                self.is_animating = True
-            else:
-                self.media_button.set_image(self.play_icon)
-                self.is_animating = False
-                self.bar_heights = [0, 0, 0, 0, 0]
-                self.waveform.queue_draw()
+            title = self.mpris_player.title or ""
+            length = int(self.mpris_player.length or 0) / 1000000
+            art_url = self.mpris_player.arturl or ""
+            position = self.mpris_player.position / 1000000
         except Exception:
-            self.media_title.set_text("No track")
-            self.media_progress.children = [create_progress_bar(0, width=80, height=5)]
+            self.show_no_track()
+            return
+        if len(title) > 20:
+            title = title[:20] + "..."
+        self.media_title.set_text(title or "No track")
+        self.current_track_length = length
+        tot_m = int((length % 3600) // 60)
+        tot_s = int(length % 60)
+        self.media_time.set_text(f"{tot_m}:{tot_s:02d}")
+        self.set_position_anchor(position)
+        self.update_progress_display()
+        if art_url != self.current_art_url:
+            self.current_art_url = art_url
+            self.update_track_art(art_url)
+
+    def on_playback_status_changed(self):
+        if not self.mpris_player:
+            return
+        try:
+            playing = self.mpris_player.playback_status == "playing"
+            position = self.mpris_player.position / 1000000
+        except Exception:
+            self.show_no_track()
+            return
+        # Anchor before flipping state so the interpolation starts from here
+        self.is_playing = playing
+        self.set_position_anchor(position)
+        if playing:
+            self.media_button.set_image(self.pause_icon)
+            self.is_animating = True
+        else:
             self.media_button.set_image(self.play_icon)
             self.is_animating = False
             self.bar_heights = [0, 0, 0, 0, 0]
             self.waveform.queue_draw()
+        self.parent.scheduler.refresh()
+        self.update_progress_display()
+
+    def on_seeked(self, _player, position):
+        self.set_position_anchor(position / 1000000)
+        self.update_progress_display()
+
+    # --- Position Interpolation ---
+    def set_position_anchor(self, position):
+        self.position_anchor = position
+        self.position_anchor_time = GLib.get_monotonic_time()
+
+    def get_current_position(self):
+        position = self.position_anchor
+        if self.is_playing:
+            position += (GLib.get_monotonic_time() - self.position_anchor_time) / 1000000
+        if self.current_track_length > 0:
+            position = min(position, self.current_track_length)
+        return position
+
+    def on_position_tick(self):
+        self.update_progress_display()
         return True
 
+    def update_progress_display(self):
+        position = self.get_current_position()
+        length = self.current_track_length
+        cur_m = int((position % 3600) // 60)
+        cur_s = int(position % 60)
+        self.media_current_time.set_text(f"{cur_m}:{cur_s:02d}")
+        if not self.is_dragging_progress:
+            progress_percentage = (position / length) * 100 if length > 0 else 0
+            self.media_progress.value = progress_percentage
+
+    def update_track_art(self, art_url):
+        if not art_url:
+            return
+        self.art_cache.request(art_url, lambda artwork: self.on_track_art_ready(art_url, artwork))
+
+    def on_track_art_ready(self, art_url, artwork):
+        # Drop results for tracks we already moved past
+        if artwork is None or art_url != self.current_art_url:
+            return
+        self.full_pixbuf = artwork.pixbuf
+        self.scaled_pixbufs = dict(artwork.variants)
+        self.parent.average_color = get_average_color(artwork.pixbuf)
+        self.waveform.queue_draw()
+        self.track_image.set_size_request(self.current_track_size, self.current_track_size)
+        self.track_image.queue_draw()
+
+    def show_no_track(self):
+        self.media_title.set_text("No track")
+        self.media_current_time.set_text("0:00")
+        self.media_progress.value = 0
+        self.media_button.set_image(self.play_icon)
+        self.current_track_length = 0
+        self.is_playing = False
+        self.is_animating = False
+        self.bar_heights = [0, 0, 0, 0, 0]
+        self.waveform.queue_draw()
+        self.parent.scheduler.refresh()
+
+    def refresh_media_info(self):
+        # Resync everything from the player's cached properties, no polling involved.
+        if not self.mpris_player:
+            self.show_no_track()
+            return False
+        self.on_metadata_changed()
+        self.on_playback_status_changed()
+        return False
+
 # ...possible extra helper methods...
@@ -2,36 +2,9 @@ from fabric.widgets.wayland import WaylandWindow as Window
 from fabric.widgets.label import Label
 from fabric.widgets.box import Box
 from gi.repository import GLib, Gdk
-import subprocess, re
-
-def create_progress_bar(percentage, width=150):
-    """Return a Box widget that looks like a progress bar"""
-    container = Box(orientation='h', name="progress-container")
-    progress = Box(name="progress-fill", style=f"min-width: {percentage * width / 100}px;")
-    background = Box(name="progress-background", style=f"min-width: {width}px;")
-    background.children = [progress]
-    container.children = [background]
-    return container
-
-def get_brightness():
-    # Uses brightnessctl to get current and max brightness, then computes percentage.
-    try:
-        current = int(subprocess.check_output(["brightnessctl", "g"], encoding="utf-8").strip())
-        maximum = int(subprocess.check_output(["brightnessctl", "m"], encoding="utf-8").strip())
-        return int((current / maximum) * 100)
-    except Exception as e:
-        print("Error getting brightness:", e)
-    return None
-
-def get_volume_percentage():
-    # Get current volume percentage from pactl output.
-    try:
-        out = subprocess.check_output(["pactl", "get-sink-volume", "@DEFAULT_SINK@"], universal_newlines=True)
-        m = re.search(r"(\d+)%", out)
-        if m:
-            return int(m.group(1))
-    except Exception:
-        return None
+from services.audio import get_audio
+from services.brightness import get_brightness_service
+from widgets.progress_bar import ProgressBar
 
 class VolumeOSD(Window):
     def __init__(self):
@@ -45,9 +18,9 @@ class VolumeOSD(Window):
         )
         
         self.brightness_label = Label(name="brightness-label", markup="Brightness: --%")
-        self.brightness_progress = Box(name="brightness-progress")
+        self.brightness_progress = ProgressBar(name="brightness-progress", size=(150, 8))
         self.volume_label = Label(name="volume-label", markup="Volume: --%")
-        self.volume_progress = Box(name="volume-progress")
+        self.volume_progress = ProgressBar(name="volume-progress", size=(150, 8))
         
         # Create a horizontal box as main container
         self.children = Box(
@@ -70,43 +43,24 @@ class VolumeOSD(Window):
         )
         
         self.hide_timeout_id = None
-        self.last_volume = get_volume_percentage()
-        self.displayed_brightness = get_brightness()
-        self._start_monitoring()
-        GLib.timeout_add(150, self._check_brightness)
-
-    def _start_monitoring(self):
-        # Start pactl subscribe and attach a GLib IO watch to its stdout.
-        self.subscribe_proc = subprocess.Popen(
-            ["pactl", "subscribe"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            encoding="utf-8",
-            universal_newlines=True,
-        )
-        if self.subscribe_proc.stdout:
-            GLib.io_add_watch(self.subscribe_proc.stdout, GLib.IO_IN, self._on_volume_event)
-
-    def _on_volume_event(self, source, condition):
-        # Read one line from pactl subscribe output.
-        line = source.readline()
-        if "sink" in line.lower():
-            self.update_osd()
-        return True
+        self.audio = get_audio()
+        # None until the audio service has connected
+        self.last_volume = self.audio.volume if self.audio.ready else None
+        self.brightness = get_brightness_service()
+        self.displayed_brightness = self.brightness.percentage
+        self.audio.connect("changed", self._on_audio_changed)
+        self.brightness.connect("changed", lambda *_: self.update_osd())
 
-    def _check_brightness(self):
-        # Periodically check brightness and update.
-        current = get_brightness()
-        if current is not None:
-            self.update_osd()
-        return True
+    def _on_audio_changed(self, audio):
+        if self.last_volume is None:
+            # First value after connecting, nothing to show
+            self.last_volume = audio.volume
+            return
+        self.update_osd()
 
     def update_osd(self):
-        current_vol = get_volume_percentage()
-        current_bri = get_brightness()
-        # Fallback to stored volume if None
-        if current_vol is None:
-            current_vol = self.last_volume
+        current_vol = self.audio.volume if self.audio.ready else self.last_volume
+        current_bri = self.brightness.percentage
         # Only update if either volume or brightness has changed.
         if current_vol == self.last_volume and current_bri == self.displayed_brightness:
             return
@@ -116,8 +70,8 @@ class VolumeOSD(Window):
         self.brightness_label.set_markup(f"<span font='14'>Brightness: {current_bri}%</span>")
         self.volume_label.set_markup(f"<span font='14'>Volume: {current_vol}%</span>")
         
-        self.brightness_progress.children = create_progress_bar(current_bri or 0)
-        self.volume_progress.children = create_progress_bar(current_vol or 0)
+        self.brightness_progress.value = current_bri or 0
+        self.volume_progress.value = current_vol or 0
         
         self.show_all()
         if self.hide_timeout_id is not None:
@@ -1,5 +1,4 @@
 import os
-import hashlib
 import shutil        # <-- added import for shutil
 from gi.repository import GdkPixbuf, Gtk, GLib, Gio, Gdk  # Se agregó Gdk para capturar teclas
 from fabric.widgets.box import Box
@@ -8,12 +7,18 @@ from fabric.widgets.entry import Entry
 from fabric.widgets.button import Button
 from fabric.widgets.scrolledwindow import ScrolledWindow
 from fabric.widgets.label import Label
-from fabric.utils.helpers import exec_shell_command_async
 import modules.icons as icons
 import modules.data as data
-from PIL import Image
-import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
+import bisect
+from collections import OrderedDict
+from utils.palette_cache import DEFAULT_SCHEME, PaletteCache
+from utils.thumbnail_index import ThumbnailIndex
+from utils.thumbnailer import THUMBNAIL_EXTENSION, THUMBNAIL_SIZE, get_pool, make_thumbnail
+
+# Decoded thumbnails kept around at most, the rest of the rows show a placeholder
+MAX_RESIDENT_THUMBNAILS = 256
+# Thumbnails decoded per idle iteration while filling the visible range
+DECODE_BATCH = 24
 
 class WallpaperSelector(Box):
     CACHE_DIR = os.path.expanduser("~/.cache/ax-shell/thumbs")  # Changed from wallpapers to thumbs
@@ -26,22 +31,48 @@ class WallpaperSelector(Box):
         
         super().__init__(name="wallpapers", spacing=4, orientation="v", h_expand=False, v_expand=False, **kwargs)
         os.makedirs(self.CACHE_DIR, exist_ok=True)
+        self.index = ThumbnailIndex(self.CACHE_DIR, extension=THUMBNAIL_EXTENSION)
         self.files = sorted([f for f in os.listdir(data.WALLPAPERS_DIR) if self._is_image(f)])
-        self.thumbnails = []
+        self.thumbnails = {}  # file name -> thumbnail path
         self.thumbnail_queue = []
-        self.executor = ThreadPoolExecutor(max_workers=4)  # Shared executor
+        # Only rows in or near the visible range hold a decoded pixbuf
+        self.resident = OrderedDict()  # file name -> pixbuf, LRU order
+        self._rows = {}  # file name -> store iter, rows are never rebuilt
+        # (casefolded name, name) in display order, mirrors the store
+        self._sort_keys = []
+        self._keys = {}  # file name -> casefolded name
+        self._query = ""
+        self._matches = set()  # names of the rows currently shown
+        self._visible_update_id = None
+        self.placeholder = GdkPixbuf.Pixbuf.new(
+            GdkPixbuf.Colorspace.RGB, True, 8, THUMBNAIL_SIZE, THUMBNAIL_SIZE
+        )
+        self.placeholder.fill(0x00000000)
+        self.thumbnailer = get_pool()  # Shared process pool
+        self.palettes = PaletteCache()
+        self.current_wallpaper = None  # last wallpaper applied from here
+        self._pending_palettes = set()  # new files waiting for their thumbnail
+        # Startup thumbnails not yet recorded in the index, pruning waits for them
+        self._preload_left = 0
+        self._preload_submitted = False
 
         # Variable para controlar la selección (similar a AppLauncher)
         self.selected_index = -1
 
         # Inicialización de componentes UI
         self.viewport = Gtk.IconView(name="wallpaper-icons")
-        self.viewport.set_model(Gtk.ListStore(GdkPixbuf.Pixbuf, str))
+        # pixbuf, file name, casefolded name, matches the current query
+        self.store = Gtk.ListStore(GdkPixbuf.Pixbuf, str, str, bool)
+        self.filter = self.store.filter_new()
+        self.filter.set_visible_column(3)
+        self.viewport.set_model(self.filter)
         self.viewport.set_pixbuf_column(0)
         # Quitamos la columna de texto para que solo se muestre la imagen
         self.viewport.set_text_column(-1)
         self.viewport.set_item_width(0)
         self.viewport.connect("item-activated", self.on_wallpaper_selected)
+        self.viewport.connect("map", self._schedule_visible_update)
+        self.viewport.connect("unmap", self.release_thumbnails)
 
         self.scrolled_window = ScrolledWindow(
             name="scrolled-window",
@@ -50,6 +81,9 @@ class WallpaperSelector(Box):
             v_expand=True,
             child=self.viewport,
         )
+        vadjustment = self.scrolled_window.get_vadjustment()
+        vadjustment.connect("value-changed", self._schedule_visible_update)
+        vadjustment.connect("changed", self._schedule_visible_update)
 
         self.search_entry = Entry(
             name="search-entry-walls",
@@ -95,6 +129,7 @@ class WallpaperSelector(Box):
 
         self.add(self.header_box)
         self.add(self.scrolled_window)
+        self._load_from_index()
         self._start_thumbnail_thread()
         self.setup_file_monitor()  # Inicializamos la monitorización de archivos
         self.show_all()
@@ -109,48 +144,48 @@ class WallpaperSelector(Box):
     def on_directory_changed(self, monitor, file, other_file, event_type):
         file_name = file.get_basename()
         if event_type == Gio.FileMonitorEvent.DELETED:
+            self._pending_palettes.discard(file_name)
             if file_name in self.files:
                 self.files.remove(file_name)
-                cache_path = self._get_cache_path(file_name)
-                if os.path.exists(cache_path):
-                    try:
-                        os.remove(cache_path)
-                    except Exception as e:
-                        print(f"Error deleting cache {cache_path}: {e}")
-                self.thumbnails = [(p, n) for p, n in self.thumbnails if n != file_name]
-                GLib.idle_add(self.arrange_viewport, self.search_entry.get_text())
+                self.index.remove(os.path.join(data.WALLPAPERS_DIR, file_name))
+                self.thumbnails.pop(file_name, None)
+                self.resident.pop(file_name, None)
+                self._remove_row(file_name)
         elif event_type == Gio.FileMonitorEvent.CREATED:
             if self._is_image(file_name) and file_name not in self.files:
                 self.files.append(file_name)
                 self.files.sort()
-                self.executor.submit(self._process_file, file_name)
+                # Pre-generate the default palette once the file is readable,
+                # which a finished thumbnail proves
+                self._pending_palettes.add(file_name)
+                self._process_file(file_name)
         elif event_type == Gio.FileMonitorEvent.CHANGED:
+            # The index is keyed by mtime and size, so only real edits regenerate
             if self._is_image(file_name) and file_name in self.files:
-                cache_path = self._get_cache_path(file_name)
-                if os.path.exists(cache_path):
-                    try:
-                        os.remove(cache_path)
-                    except Exception as e:
-                        print(f"Error deleting cache for changed file {file_name}: {e}")
-                self.executor.submit(self._process_file, file_name)
+                self._process_file(file_name)
 
     def arrange_viewport(self, query: str = ""):
-        model = self.viewport.get_model()
-        model.clear()
-        filtered_thumbnails = [
-            (thumb, name)
-            for thumb, name in self.thumbnails
-            if query.casefold() in name.casefold()
-        ]
-        filtered_thumbnails.sort(key=lambda x: x[1].lower())
-        for pixbuf, file_name in filtered_thumbnails:
-            model.append([pixbuf, file_name])
+        # Rows stay in the store, a keystroke only flips the ones whose match changed
+        new_query = query.casefold()
+        old_query = self._query
+        self._query = new_query
+        if old_query in new_query:
+            # Refinement: only the current matches can stop matching
+            candidates = list(self._matches)
+        elif new_query in old_query:
+            # Broadening: only the hidden rows can start matching
+            candidates = [name for _, name in self._sort_keys if name not in self._matches]
+        else:
+            candidates = [name for _, name in self._sort_keys]
+        for file_name in candidates:
+            self._set_row_visible(file_name, new_query in self._keys[file_name])
+        self._schedule_visible_update()
         # Si el input está vacío, no se marca ningún ícono;
         # de lo contrario, se marca el primero
         if query.strip() == "":
             self.viewport.unselect_all()
             self.selected_index = -1
-        elif len(model) > 0:
+        elif len(self.filter) > 0:
             self.update_selection(0)
 
     def on_wallpaper_selected(self, iconview, path):
@@ -158,11 +193,15 @@ class WallpaperSelector(Box):
         file_name = model[path][1]
         full_path = os.path.join(data.WALLPAPERS_DIR, file_name)
         selected_scheme = self.scheme_dropdown.get_active_id()
-        exec_shell_command_async(f'matugen image {full_path} -t {selected_scheme}')
+        self.current_wallpaper = full_path
+        self.palettes.apply(full_path, selected_scheme)
 
     def on_scheme_changed(self, combo):
         selected_scheme = combo.get_active_id()
         print(f"Color scheme selected: {selected_scheme}")
+        # Re-theme the wallpaper picked here, cached schemes apply instantly
+        if self.current_wallpaper and os.path.exists(self.current_wallpaper):
+            self.palettes.apply(self.current_wallpaper, selected_scheme)
 
     def on_search_entry_key_press(self, widget, event):
         if event.state & Gdk.ModifierType.SHIFT_MASK:
@@ -228,52 +267,187 @@ class WallpaperSelector(Box):
         self.viewport.scroll_to_path(path, False, 0.5, 0.5)  # Asegura que el ícono marcado esté visible
         self.selected_index = new_index
 
+    def _load_from_index(self):
+        # Show whatever the index already knows about without opening any source image;
+        # the thumbnail thread then validates these against the files on disk.
+        indexed = self.index.entries()
+        for file_name in self.files:
+            thumb = indexed.get(os.path.join(data.WALLPAPERS_DIR, file_name))
+            if thumb:
+                self.thumbnail_queue.append((thumb, file_name))
+        if self.thumbnail_queue:
+            GLib.idle_add(self._process_batch)
+
     def _start_thumbnail_thread(self):
         thread = GLib.Thread.new("thumbnail-loader", self._preload_thumbnails, None)
 
     def _preload_thumbnails(self, _data):
-        futures = [self.executor.submit(self._process_file, file_name) for file_name in self.files]
-        concurrent.futures.wait(futures)
-        GLib.idle_add(self._process_batch)
+        futures = [self._process_file(file_name, preload=True) for file_name in list(self.files)]
+        GLib.idle_add(self._on_preload_submitted, len([f for f in futures if f]))
 
-    def _process_file(self, file_name):
+    def _on_preload_submitted(self, count):
+        self._preload_left += count
+        self._preload_submitted = True
+        self._maybe_prune()
+        return False
+
+    def _maybe_prune(self):
+        # Prune only once every startup thumbnail is in the index, it deletes
+        # unreferenced files and would take the ones not yet recorded with it
+        if not self._preload_submitted or self._preload_left:
+            return
+        self._preload_submitted = False
+        keep = {os.path.join(data.WALLPAPERS_DIR, f) for f in self.files}
+        GLib.Thread.new("thumbnail-prune", lambda _: self.index.prune(keep), None)
+
+    def _process_file(self, file_name, preload=False):
+        # Only the stat and index lookup happen here, decoding runs in the process pool
         full_path = os.path.join(data.WALLPAPERS_DIR, file_name)
-        cache_path = self._get_cache_path(file_name)
-        if not os.path.exists(cache_path):
-            try:
-                with Image.open(full_path) as img:
-                    width, height = img.size
-                    side = min(width, height)
-                    left = (width - side) // 2
-                    top = (height - side) // 2
-                    right = left + side
-                    bottom = top + side
-                    img_cropped = img.crop((left, top, right, bottom))
-                    img_cropped.thumbnail((96, 96), Image.Resampling.LANCZOS)
-                    img_cropped.save(cache_path, "PNG")
-            except Exception as e:
-                print(f"Error processing {file_name}: {e}")
-                return
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+        if self.index.lookup(full_path, stat.st_mtime_ns, stat.st_size):
+            return None  # up to date, already shown from the index
+        cache_path = self.index.thumb_path_for(full_path, stat.st_mtime_ns, stat.st_size)
+        future = self.thumbnailer.submit(make_thumbnail, full_path, cache_path)
+        # Done callbacks run on the pool's management thread, hand over to the main loop
+        future.add_done_callback(
+            lambda f: GLib.idle_add(self._on_thumbnail_done, f, file_name, full_path, stat, preload)
+        )
+        return future
+
+    def _on_thumbnail_done(self, future, file_name, full_path, stat, preload):
+        if preload:
+            self._preload_left -= 1
+        try:
+            cache_path = future.result()
+        except Exception as e:
+            print(f"Error processing {file_name}: {e}")
+            if preload:
+                self._maybe_prune()
+            return False
+        self.index.put(full_path, stat.st_mtime_ns, stat.st_size, cache_path)
+        if preload:
+            self._maybe_prune()
+        if file_name in self._pending_palettes:
+            self._pending_palettes.discard(file_name)
+            self.palettes.pregenerate(full_path, DEFAULT_SCHEME)
         self.thumbnail_queue.append((cache_path, file_name))
         GLib.idle_add(self._process_batch)
+        return False
 
     def _process_batch(self):
-        batch = self.thumbnail_queue[:10]
-        del self.thumbnail_queue[:10]
+        # Rows start out as placeholders, decoding happens once they scroll into view
+        batch = self.thumbnail_queue[:100]
+        del self.thumbnail_queue[:100]
         for cache_path, file_name in batch:
-            try:
-                pixbuf = GdkPixbuf.Pixbuf.new_from_file(cache_path)
-                self.thumbnails.append((pixbuf, file_name))
-                self.viewport.get_model().append([pixbuf, file_name])
-            except Exception as e:
-                print(f"Error loading thumbnail {cache_path}: {e}")
+            if file_name not in self.files:
+                continue  # deleted while queued
+            if file_name in self.thumbnails:
+                # Regenerated after an edit, drop the stale picture
+                self.resident.pop(file_name, None)
+                if file_name in self._rows:
+                    self.store.set_value(self._rows[file_name], 0, self.placeholder)
+            else:
+                self._insert_row(file_name)
+            self.thumbnails[file_name] = cache_path
+        self._schedule_visible_update()
         if self.thumbnail_queue:
             GLib.idle_add(self._process_batch)
         return False
 
-    def _get_cache_path(self, file_name: str) -> str:
-        file_hash = hashlib.md5(file_name.encode("utf-8")).hexdigest()
-        return os.path.join(self.CACHE_DIR, f"{file_hash}.png")
+    def _schedule_visible_update(self, *_):
+        if self._visible_update_id is None:
+            self._visible_update_id = GLib.idle_add(self._update_visible_thumbnails)
+
+    def _update_visible_thumbnails(self):
+        self._visible_update_id = None
+        if not self.viewport.get_mapped():
+            return False
+        model = self.viewport.get_model()
+        visible = self.viewport.get_visible_range()
+        if not visible:
+            return False  # not laid out yet, the adjustment will tell us when it is
+        start = visible[0].get_indices()[0]
+        end = visible[1].get_indices()[0]
+        # Keep one page above and below decoded so scrolling doesn't flash
+        margin = end - start + 1
+        first = max(0, start - margin)
+        last = min(len(model) - 1, end + margin)
+        order = [
+            *range(start, end + 1),
+            *range(end + 1, last + 1),
+            *range(start - 1, first - 1, -1),
+        ]
+        decoded = 0
+        for i in order:
+            file_name = model[i][1]
+            if file_name in self.resident:
+                self.resident.move_to_end(file_name)
+                continue
+            thumb = self.thumbnails.get(file_name)
+            if not thumb:
+                continue  # deleted, the row goes away on the next arrange
+            if decoded >= DECODE_BATCH:
+                self._schedule_visible_update()
+                break
+            try:
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file(thumb)
+            except Exception as e:
+                print(f"Error loading thumbnail for {file_name}: {e}")
+                continue
+            decoded += 1
+            self.resident[file_name] = pixbuf
+            self.store.set_value(self._rows[file_name], 0, pixbuf)
+        self._evict_thumbnails(max(MAX_RESIDENT_THUMBNAILS, last - first + 1))
+        return False
+
+    def _evict_thumbnails(self, limit: int):
+        while len(self.resident) > limit:
+            file_name, _ = self.resident.popitem(last=False)
+            if file_name in self._rows:
+                self.store.set_value(self._rows[file_name], 0, self.placeholder)
+
+    def _insert_row(self, file_name: str):
+        key = file_name.casefold()
+        position = bisect.bisect(self._sort_keys, (key, file_name))
+        self._sort_keys.insert(position, (key, file_name))
+        self._keys[file_name] = key
+        visible = self._query in key
+        self._rows[file_name] = self.store.insert(
+            position, [self.placeholder, file_name, key, visible]
+        )
+        if visible:
+            self._matches.add(file_name)
+
+    def _remove_row(self, file_name: str):
+        row = self._rows.pop(file_name, None)
+        if row is None:
+            return
+        self._sort_keys.remove((self._keys.pop(file_name), file_name))
+        self._matches.discard(file_name)
+        self.store.remove(row)
+
+    def _set_row_visible(self, file_name: str, visible: bool):
+        if visible == (file_name in self._matches):
+            return
+        if visible:
+            self._matches.add(file_name)
+        else:
+            self._matches.discard(file_name)
+        self.store.set_value(self._rows[file_name], 3, visible)
+
+    def release_thumbnails(self, *_):
+        """Drop every decoded thumbnail, used while the selector is off screen."""
+        self._evict_thumbnails(0)
+
+    def get_memory_usage(self) -> dict:
+        return {
+            "rows": len(self.store),
+            "resident_thumbnails": len(self.resident),
+            "resident_bytes": sum(p.get_byte_length() for p in self.resident.values()),
+        }
 
     @staticmethod
     def _is_image(file_name: str) -> bool:
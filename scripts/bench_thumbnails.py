@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Benchmark the wallpaper thumbnailer on a synthetic image directory.
+
+    python scripts/bench_thumbnails.py --count 64 --size 3840x2160
+
+Reports thumbnails per second for the process pool engine and, with
+--baseline, for the old full-decode PNG path on 4 threads.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from utils.thumbnailer import THUMBNAIL_SIZE, get_pool, make_thumbnail  # noqa: E402
+
+
+def make_images(directory: str, count: int, width: int, height: int, formats: list[str]):
+    paths = []
+    rng = random.Random(0)
+    for i in range(count):
+        img = Image.new("RGB", (width, height), tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(32):
+            x, y = rng.randrange(width), rng.randrange(height)
+            r = rng.randrange(50, max(51, width // 4))
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+        ext = formats[i % len(formats)]
+        path = os.path.join(directory, f"wall-{i:04d}.{ext}")
+        img.save(path, quality=90) if ext == "jpg" else img.save(path)
+        paths.append(path)
+    return paths
+
+
+def baseline_thumbnail(src: str, dst: str, size: int = THUMBNAIL_SIZE):
+    # What WallpaperSelector used to do: full decode, crop, LANCZOS, PNG
+    with Image.open(src) as img:
+        width, height = img.size
+        side = min(width, height)
+        left = (width - side) // 2
+        top = (height - side) // 2
+        cropped = img.crop((left, top, left + side, top + side))
+        cropped.thumbnail((size, size), Image.Resampling.LANCZOS)
+        cropped.save(dst, "PNG")
+
+
+def run(label: str, executor, func, sources: list[str], out_dir: str, ext: str):
+    start = time.perf_counter()
+    futures = [
+        executor.submit(func, src, os.path.join(out_dir, f"{i}.{ext}"))
+        for i, src in enumerate(sources)
+    ]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(sources) / elapsed:8.1f} thumbs/s  ({elapsed:.2f}s for {len(sources)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=64)
+    parser.add_argument("--size", default="3840x2160", help="WIDTHxHEIGHT of the synthetic images")
+    parser.add_argument("--formats", default="jpg", help="comma separated, e.g. jpg,png,webp")
+    parser.add_argument("--baseline", action="store_true", help="also time the old thread/PNG path")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    with tempfile.TemporaryDirectory(prefix="ax-thumb-bench-") as tmp:
+        src_dir = os.path.join(tmp, "src")
+        os.makedirs(src_dir)
+        print(f"generating {args.count} {width}x{height} images ({args.formats})...")
+        sources = make_images(src_dir, args.count, width, height, args.formats.split(","))
+
+        out_dir = os.path.join(tmp, "pool")
+        os.makedirs(out_dir)
+        pool = get_pool()
+        workers = os.cpu_count() or 1
+        # warm the workers up so process start-up isn't part of the number
+        list(pool.map(abs, range(workers)))
+        run(f"process pool ({workers} workers)", pool, make_thumbnail, sources, out_dir, "jpg")
+        pool.shutdown()
+
+        if args.baseline:
+            out_dir = os.path.join(tmp, "baseline")
+            os.makedirs(out_dir)
+            with ThreadPoolExecutor(max_workers=4) as threads:
+                run("baseline (4 threads, png)", threads, baseline_thumbnail, sources, out_dir, "png")
+
+
+if __name__ == "__main__":
+    main()
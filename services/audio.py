@@ -0,0 +1,116 @@
+import gi
+from fabric.core.service import Property, Service, Signal
+from loguru import logger
+
+
+# The Cvc typelib (libcvc) is optional: without it the service stays
+# unavailable and volume control is disabled instead of the shell failing to
+# start.
+try:
+    gi.require_version("Cvc", "1.0")
+    from gi.repository import Cvc
+except (ValueError, ImportError):
+    Cvc = None
+
+
+class Audio(Service):
+    """The default sink's volume and mute state, over one persistent PulseAudio connection.
+
+    Works with pipewire-pulse as well. Changes are pushed by the sound server,
+    nothing is polled and no process is spawned.
+    """
+
+    @Signal
+    def changed(self) -> None: ...
+
+    def __init__(self, **kwargs):
+        self._sink = None
+        self._sink_handlers: list[int] = []
+        self._volume = 0
+        self._muted = False
+        super().__init__(**kwargs)
+        if Cvc is None:
+            logger.warning("[Audio] Cvc is not installed (libcvc), volume control is disabled")
+            return
+        self._control = Cvc.MixerControl(name="ax-shell")
+        self._control.connect("state-changed", self._on_state_changed)
+        self._control.connect("default-sink-changed", lambda *_: self._bind_default_sink())
+        self._control.open()
+
+    def _on_state_changed(self, control, state):
+        if state == Cvc.MixerControlState.READY:
+            self._bind_default_sink()
+        elif state == Cvc.MixerControlState.FAILED:
+            logger.error("[Audio] could not connect to the sound server")
+
+    def _bind_default_sink(self):
+        if self._sink is not None:
+            for handler in self._sink_handlers:
+                self._sink.disconnect(handler)
+        self._sink_handlers = []
+        self._sink = self._control.get_default_sink()
+        if self._sink is not None:
+            self._sink_handlers = [
+                self._sink.connect("notify::volume", lambda *_: self._sync()),
+                self._sink.connect("notify::is-muted", lambda *_: self._sync()),
+            ]
+        self._sync()
+
+    def _sync(self):
+        # Only real moves are announced, the server also notifies on no-op writes
+        volume, muted = self._read_sink()
+        volume_changed = volume != self._volume
+        muted_changed = muted != self._muted
+        self._volume, self._muted = volume, muted
+        if volume_changed:
+            self.notify("volume")
+        if muted_changed:
+            self.notify("muted")
+        if volume_changed or muted_changed:
+            self.emit("changed")
+
+    def _read_sink(self) -> tuple[int, bool]:
+        if self._sink is None:
+            return 0, False
+        volume = round(self._sink.get_volume() * 100 / self._control.get_vol_max_norm())
+        return volume, self._sink.get_is_muted()
+
+    @Property(bool, "readable", default_value=False)
+    def ready(self) -> bool:
+        return self._sink is not None
+
+    @Property(int, "read-write", default_value=0)
+    def volume(self) -> int:
+        """Default sink volume in percent, may go above 100 when amplified."""
+        return self._volume
+
+    @volume.setter
+    def volume(self, percent: int):
+        if self._sink is None:
+            return
+        percent = max(0, min(int(percent), 150))
+        self._sink.set_volume(round(percent * self._control.get_vol_max_norm() / 100))
+        self._sink.push_volume()
+
+    @Property(bool, "read-write", default_value=False)
+    def muted(self) -> bool:
+        return self._muted
+
+    @muted.setter
+    def muted(self, muted: bool):
+        if self._sink is not None:
+            self._sink.change_is_muted(muted)
+
+    def adjust_volume(self, delta: int):
+        self.volume = self._volume + delta
+
+
+_audio: Audio | None = None
+
+
+def get_audio() -> Audio:
+    """The shell wide Audio service, created on first use."""
+    global _audio
+    if _audio is None:
+        _audio = Audio()
+    return _audio
@@ -0,0 +1,140 @@
+import os
+
+from fabric.core.service import Property, Service, Signal
+from gi.repository import Gio, GLib
+from loguru import logger
+
+BACKLIGHT_DIR = "/sys/class/backlight"
+
+
+class Brightness(Service):
+    """Screen backlight read straight from sysfs and watched with a file monitor.
+
+    ``max_brightness`` is read once. Writes go to sysfs when the file is
+    writable (udev rules usually grant the video group), otherwise through
+    logind's Session.SetBrightness. No brightnessctl process is involved.
+    """
+
+    @Signal
+    def changed(self) -> None: ...
+
+    def __init__(self, device: str | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.device = device or self._find_device()
+        self._brightness = 0
+        self._max_brightness = 0
+        self._monitor = None
+        if self.device is None:
+            logger.info("[Brightness] no backlight device found")
+            return
+        self._path = os.path.join(BACKLIGHT_DIR, self.device)
+        try:
+            with open(os.path.join(self._path, "max_brightness")) as f:
+                self._max_brightness = int(f.read())
+        except (OSError, ValueError) as e:
+            logger.error(f"[Brightness] could not read max_brightness: {e}")
+            self.device = None
+            return
+        self._brightness = self._read()
+        self._monitor = Gio.File.new_for_path(
+            os.path.join(self._path, "brightness")
+        ).monitor_file(Gio.FileMonitorFlags.NONE, None)
+        self._monitor.set_rate_limit(50)
+        self._monitor.connect("changed", lambda *_: self._sync())
+
+    @staticmethod
+    def _find_device() -> str | None:
+        try:
+            devices = sorted(os.listdir(BACKLIGHT_DIR))
+        except OSError:
+            return None
+        return devices[0] if devices else None
+
+    def _read(self) -> int:
+        try:
+            with open(os.path.join(self._path, "brightness")) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return self._brightness
+
+    def _sync(self):
+        brightness = self._read()
+        if brightness == self._brightness:
+            return
+        old_percentage = self.percentage
+        self._brightness = brightness
+        self.notify("brightness")
+        if self.percentage != old_percentage:
+            self.notify("percentage")
+        self.emit("changed")
+
+    @Property(bool, "readable", default_value=False)
+    def available(self) -> bool:
+        return self.device is not None
+
+    @Property(int, "readable", default_value=0)
+    def max_brightness(self) -> int:
+        return self._max_brightness
+
+    @Property(int, "read-write", default_value=0)
+    def brightness(self) -> int:
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value: int):
+        if self.device is None:
+            return
+        value = max(0, min(int(value), self._max_brightness))
+        try:
+            with open(os.path.join(self._path, "brightness"), "w") as f:
+                f.write(str(value))
+            self._sync()
+        except PermissionError:
+            self._set_with_logind(value)
+        except OSError as e:
+            logger.error(f"[Brightness] could not set brightness: {e}")
+
+    @Property(int, "read-write", default_value=0)
+    def percentage(self) -> int:
+        if not self._max_brightness:
+            return 0
+        return int(self._brightness / self._max_brightness * 100)
+
+    @percentage.setter
+    def percentage(self, percent: int):
+        self.brightness = round(max(0, min(percent, 100)) * self._max_brightness / 100)
+
+    def adjust(self, delta_percent: int):
+        # Relative to the cached value, no read needed
+        self.brightness = self._brightness + round(delta_percent * self._max_brightness / 100)
+
+    def _set_with_logind(self, value: int):
+        Gio.bus_get_sync(Gio.BusType.SYSTEM, None).call(
+            "org.freedesktop.login1",
+            "/org/freedesktop/login1/session/auto",
+            "org.freedesktop.login1.Session",
+            "SetBrightness",
+            GLib.Variant("(ssu)", ("backlight", self.device, value)),
+            None,
+            Gio.DBusCallFlags.NONE,
+            -1,
+            None,
+            lambda bus, result: self._on_logind_reply(bus, result),
+        )
+
+    def _on_logind_reply(self, bus, result):
+        try:
+            bus.call_finish(result)
+        except GLib.Error as e:
+            logger.error(f"[Brightness] logind refused to set brightness: {e.message}")
+
+
+_brightness: Brightness | None = None
+
+
+def get_brightness_service() -> Brightness:
+    """The shell wide Brightness service, created on first use."""
+    global _brightness
+    if _brightness is None:
+        _brightness = Brightness()
+    return _brightness
@@ -35,6 +35,9 @@ class MprisPlayer(Service):
     @Signal
     def changed(self) -> None: ...
 
+    @Signal
+    def seeked(self, position: float) -> None: ...
+
     def __init__(
         self,
         player: Playerctl.Player,
@@ -43,12 +46,19 @@ class MprisPlayer(Service):
         self._signal_connectors: dict = {}
         self._player: Playerctl.Player = player
         super().__init__(**kwargs)
-        for sn in ["playback-status", "loop-status", "shuffle", "volume", "seeked"]:
+        for sn in ["playback-status", "loop-status", "shuffle", "volume"]:
             self._signal_connectors[sn] = self._player.connect(
                 sn,
                 lambda *args, sn=sn: self.notifier(sn, args),
             )
 
+        # position is in microseconds, passed along so listeners can
+        # re-anchor their clocks without another dbus round trip
+        self._signal_connectors["seeked"] = self._player.connect(
+            "seeked",
+            lambda _, position: self.emit("seeked", float(position)),
+        )
+
         self._signal_connectors["exit"] = self._player.connect(
             "exit",
             self.on_player_exit,
@@ -96,11 +106,15 @@ class MprisPlayer(Service):
             return False
         GLib.idle_add(notify_and_emit, priority=GLib.PRIORITY_DEFAULT_IDLE)
 
-    def on_player_exit(self, player):
+    def release(self):
+        """Disconnect from the underlying player, this wrapper stops following it."""
         for id in list(self._signal_connectors.values()):
             with contextlib.suppress(Exception):
                 self._player.disconnect(id)
-        del self._signal_connectors
+        self._signal_connectors = {}
+
+    def on_player_exit(self, player):
+        self.release()
         GLib.idle_add(lambda: (self.emit("exit", True), False))
         del self._player
 
@@ -0,0 +1,233 @@
+import heapq
+import math
+import os
+import time
+from collections import defaultdict
+from collections.abc import Callable
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from fabric.utils import DesktopApp
+from gi.repository import Gio, GLib, Gtk
+
+# Search index over the installed desktop entries.
+#
+# Every 1, 2 and 3 character substring of an app's searchable text maps to the
+# apps containing it, so a query of up to three characters is a single lookup
+# and longer ones intersect their trigram sets before the exact check. Only
+# those candidates get scored, and only the best ``limit`` come back.
+# When nothing contains the query, a subsequence ("ffx" -> Firefox) pass runs
+# over everything as a fallback.
+
+MAX_GRAM = 3
+# Debounce for bursts of .desktop changes (package installs touch many files)
+REFRESH_DELAY_MS = 500
+USAGE_WEIGHT = 100
+# Most used apps put first in the empty query view
+FREQUENT_APPS = 8
+
+
+def _grams(text: str) -> set[str]:
+    return {
+        text[i:i + n]
+        for n in range(1, MAX_GRAM + 1)
+        for i in range(len(text) - n + 1)
+    }
+
+
+def _subsequence_score(query: str, text: str) -> float | None:
+    # Each query character must appear in order, tighter matches score higher
+    pos = -1
+    gaps = 0
+    for char in query:
+        found = text.find(char, pos + 1)
+        if found == -1:
+            return None
+        if pos != -1:
+            gaps += found - pos - 1
+        pos = found
+    return 200 - min(gaps, 150)
+
+
+class AppSearchIndex:
+    def __init__(
+        self,
+        usage: Callable[[str], float] | None = None,
+        frequent: Callable[[int], list[str]] | None = None,
+    ):
+        """``usage(desktop_id)`` returns how often an app is used, it boosts the ranking.
+        ``frequent(n)`` returns the ``n`` most used desktop ids, shown first for an empty query.
+        """
+        self.usage = usage or (lambda desktop_id: 0)
+        self.frequent = frequent or (lambda n: [])
+        self.last_query_ms = 0.0
+        self._icon_theme = Gtk.IconTheme.get_default()
+        self._apps: dict[str, DesktopApp] = {}
+        self._ids: dict[int, str] = {}  # id(DesktopApp) -> desktop id
+        self._names: dict[str, str] = {}  # casefolded display name
+        self._texts: dict[str, str] = {}  # casefolded searchable text
+        self._grams: dict[str, set[str]] = defaultdict(set)
+        self._alphabetical: list[str] | None = None
+        self._order: dict[str, int] = {}
+        self._default_view: list[DesktopApp] | None = None
+        self._default_key: tuple[str, ...] = ()
+        self._monitors = []
+        self._pending: set[str] = set()
+        self._refresh_id = None
+        self._on_changed = None
+        for info in Gio.DesktopAppInfo.get_all():
+            if info.should_show():
+                self._add(info)
+
+    def __len__(self):
+        return len(self._apps)
+
+    def desktop_id(self, app: DesktopApp) -> str | None:
+        return self._ids.get(id(app))
+
+    def get(self, desktop_id: str) -> DesktopApp | None:
+        return self._apps.get(desktop_id)
+
+    def alphabetical(self) -> list[DesktopApp]:
+        return [self._apps[desktop_id] for desktop_id in self._sorted_ids()]
+
+    def query(self, query: str, limit: int = 50) -> list[DesktopApp]:
+        """The best ``limit`` apps for ``query``.
+
+        An empty query lists every app, the most used first and the rest alphabetically.
+        """
+        start = time.perf_counter()
+        query = query.strip().casefold()
+        if not query:
+            results = self._empty_view()
+        else:
+            candidates = self._candidates(query)
+            scored = []
+            for desktop_id in candidates:
+                score = self._score(query, desktop_id)
+                if score is not None:
+                    scored.append((score, desktop_id))
+            if not scored:
+                for desktop_id in self._apps:
+                    score = _subsequence_score(query, self._texts[desktop_id])
+                    if score is not None:
+                        scored.append((score + self._usage_boost(desktop_id), desktop_id))
+            self._sorted_ids()  # makes sure _order is current for the tie break
+            best = heapq.nlargest(
+                limit, scored, key=lambda item: (item[0], -self._order[item[1]])
+            )
+            results = [self._apps[desktop_id] for _, desktop_id in best]
+        self.last_query_ms = (time.perf_counter() - start) * 1000
+        return results
+
+    def _empty_view(self) -> list[DesktopApp]:
+        # Rebuilt only when the apps or the most used ones change
+        key = tuple(desktop_id for desktop_id in self.frequent(FREQUENT_APPS) if desktop_id in self._apps)
+        if self._default_view is None or key != self._default_key:
+            first = set(key)
+            self._default_view = [self._apps[desktop_id] for desktop_id in key] + [
+                self._apps[desktop_id] for desktop_id in self._sorted_ids() if desktop_id not in first
+            ]
+            self._default_key = key
+        return self._default_view
+
+    def watch(self, on_changed: Callable[[], None] | None = None):
+        """Follow the applications directories and reindex changed entries."""
+        self._on_changed = on_changed
+        data_dirs = [GLib.get_user_data_dir(), *GLib.get_system_data_dirs()]
+        for data_dir in data_dirs:
+            directory = os.path.join(data_dir, "applications")
+            if not os.path.isdir(directory):
+                continue
+            monitor = Gio.File.new_for_path(directory).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+            monitor.connect("changed", self._on_directory_changed)
+            self._monitors.append(monitor)
+
+    def _on_directory_changed(self, monitor, file, other_file, event_type):
+        for changed in (file, other_file):
+            if changed and changed.get_basename().endswith(".desktop"):
+                self._pending.add(changed.get_basename())
+        if self._pending and self._refresh_id is None:
+            self._refresh_id = GLib.timeout_add(REFRESH_DELAY_MS, self._refresh_pending)
+
+    def _refresh_pending(self):
+        self._refresh_id = None
+        pending, self._pending = self._pending, set()
+        for desktop_id in pending:
+            self._remove(desktop_id)
+            # Resolved through the XDG lookup, so a user override or a
+            # shadowed system entry wins exactly like it does everywhere else
+            try:
+                info = Gio.DesktopAppInfo.new(desktop_id)
+            except TypeError:
+                info = None
+            if info is not None and info.should_show():
+                self._add(info)
+        if self._on_changed:
+            self._on_changed()
+        return False
+
+    def _add(self, info: Gio.DesktopAppInfo):
+        desktop_id = info.get_id()
+        app = DesktopApp(info, self._icon_theme)
+        name = (app.display_name or "").casefold()
+        text = f"{app.display_name or ''} {app.name} {app.generic_name or ''}".casefold()
+        self._apps[desktop_id] = app
+        self._ids[id(app)] = desktop_id
+        self._names[desktop_id] = name
+        self._texts[desktop_id] = text
+        for gram in _grams(text):
+            self._grams[gram].add(desktop_id)
+        self._alphabetical = None
+        self._default_view = None
+
+    def _remove(self, desktop_id: str):
+        app = self._apps.pop(desktop_id, None)
+        if app is None:
+            return
+        self._ids.pop(id(app), None)
+        self._names.pop(desktop_id)
+        for gram in _grams(self._texts.pop(desktop_id)):
+            ids = self._grams[gram]
+            ids.discard(desktop_id)
+            if not ids:
+                del self._grams[gram]
+        self._alphabetical = None
+        self._default_view = None
+
+    def _sorted_ids(self) -> list[str]:
+        if self._alphabetical is None:
+            self._alphabetical = sorted(self._apps, key=lambda desktop_id: self._names[desktop_id])
+            self._order = {desktop_id: i for i, desktop_id in enumerate(self._alphabetical)}
+        return self._alphabetical
+
+    def _candidates(self, query: str) -> set[str]:
+        if len(query) <= MAX_GRAM:
+            return self._grams.get(query, set())
+        sets = sorted(
+            (self._grams.get(query[i:i + MAX_GRAM], set()) for i in range(len(query) - MAX_GRAM + 1)),
+            key=len,
+        )
+        return set.intersection(*sets) if sets[0] else set()
+
+    def _score(self, query: str, desktop_id: str) -> float | None:
+        text = self._texts[desktop_id]
+        position = text.find(query)
+        if position == -1:
+            return None  # trigram false positive
+        name = self._names[desktop_id]
+        if name == query:
+            score = 1000
+        elif name.startswith(query):
+            score = 800 - len(name)
+        elif any(word.startswith(query) for word in text.split()):
+            score = 600
+        else:
+            score = 400 - min(position, 100)
+        return score + self._usage_boost(desktop_id)
+
+    def _usage_boost(self, desktop_id: str) -> float:
+        return USAGE_WEIGHT * math.log1p(max(self.usage(desktop_id), 0))
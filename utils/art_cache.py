@@ -0,0 +1,167 @@
+import hashlib
+import os
+import threading
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cairo
+import gi
+import requests
+from loguru import logger
+
+gi.require_version("Gdk", "3.0")
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import Gdk, GdkPixbuf, GLib
+
+
+# Album art pipeline: download -> decode -> round -> scaled variants, all done
+# on a worker pool. The main loop only gets the finished pixbufs back.
+#   disk:   raw downloads keyed by sha1(url), size capped, oldest access evicted
+#   memory: finished renders keyed by (url, size), capped by entry count
+
+
+ART_CACHE_DIR = os.path.expanduser("~/.cache/ax-shell/art")
+DOWNLOAD_TIMEOUT = 5  # seconds
+MAX_DISK_BYTES = 64 * 1024 * 1024
+MAX_MEMORY_ENTRIES = 16
+
+
+def create_rounded_pixbuf(pixbuf: GdkPixbuf.Pixbuf, radius: int = 10) -> GdkPixbuf.Pixbuf:
+    size = min(pixbuf.get_width(), pixbuf.get_height())
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
+    cr = cairo.Context(surface)
+    cr.move_to(radius, 0)
+    cr.arc(size - radius, radius, radius, -90 * (3.14159 / 180), 0)
+    cr.arc(size - radius, size - radius, radius, 0, 90 * (3.14159 / 180))
+    cr.arc(radius, size - radius, radius, 90 * (3.14159 / 180), 180 * (3.14159 / 180))
+    cr.arc(radius, radius, radius, 180 * (3.14159 / 180), 270 * (3.14159 / 180))
+    cr.close_path()
+    cr.clip()
+    Gdk.cairo_set_source_pixbuf(cr, pixbuf, 0, 0)
+    cr.paint()
+    return Gdk.pixbuf_get_from_surface(surface, 0, 0, size, size)
+
+
+class Artwork:
+    """A finished render: the rounded pixbuf plus pre-scaled variants keyed by size."""
+
+    def __init__(self, url: str, pixbuf: GdkPixbuf.Pixbuf, variants: dict[int, GdkPixbuf.Pixbuf]):
+        self.url = url
+        self.pixbuf = pixbuf
+        self.variants = variants
+
+
+class ArtCache:
+    def __init__(
+        self,
+        size: int = 64,
+        variant_sizes: tuple[int, ...] = (32,),
+        radius: int = 10,
+        cache_dir: str = ART_CACHE_DIR,
+        max_disk_bytes: int = MAX_DISK_BYTES,
+        max_memory_entries: int = MAX_MEMORY_ENTRIES,
+        max_workers: int = 2,
+    ):
+        self.size = size
+        self.variant_sizes = variant_sizes
+        self.radius = radius
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_entries = max_memory_entries
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="art-cache")
+        self._disk_lock = threading.Lock()
+        # main thread only
+        self._memory: OrderedDict[str, Artwork] = OrderedDict()
+        self._pending: dict[str, list] = {}
+
+    def request(self, url: str, callback):
+        """Call ``callback(artwork | None)`` on the main loop once ``url`` is rendered."""
+        if not url:
+            callback(None)
+            return
+        if url in self._memory:
+            self._memory.move_to_end(url)
+            callback(self._memory[url])
+            return
+        if url in self._pending:
+            self._pending[url].append(callback)
+            return
+        self._pending[url] = [callback]
+        self._executor.submit(self._render, url)
+
+    def _render(self, url: str):
+        artwork = None
+        try:
+            path = self._resolve(url)
+            if path:
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(path, self.size, self.size, True)
+                rounded = create_rounded_pixbuf(pixbuf, self.radius)
+                variants = {rounded.get_width(): rounded}
+                for variant in self.variant_sizes:
+                    variants[variant] = rounded.scale_simple(
+                        variant, variant, GdkPixbuf.InterpType.BILINEAR
+                    )
+                artwork = Artwork(url, rounded, variants)
+        except Exception as e:
+            logger.warning(f"[ArtCache] failed to render '{url}': {e}")
+        GLib.idle_add(self._deliver, url, artwork)
+
+    def _deliver(self, url: str, artwork: Artwork | None):
+        if artwork:
+            self._memory[url] = artwork
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+        for callback in self._pending.pop(url, []):
+            callback(artwork)
+        return False
+
+    def _resolve(self, url: str) -> str | None:
+        parsed = urllib.parse.urlparse(url)
+        if parsed.scheme in ("", "file"):
+            path = urllib.parse.unquote(parsed.path)
+            return path if os.path.isfile(path) else None
+        if parsed.scheme not in ("http", "https"):
+            return None
+
+        file_path = os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        if os.path.exists(file_path):
+            # bump the access time so eviction sees this entry as recent
+            os.utime(file_path)
+            return file_path
+
+        response = requests.get(url, timeout=DOWNLOAD_TIMEOUT)
+        if response.status_code != 200:
+            return None
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp_path, file_path)
+        self._evict_disk()
+        return file_path
+
+    def _evict_disk(self):
+        with self._disk_lock:
+            entries = []
+            total = 0
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.endswith(".tmp"):
+                        continue
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total <= self.max_disk_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_disk_bytes:
+                    break
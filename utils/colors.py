@@ -0,0 +1,56 @@
+import threading
+import weakref
+
+import gi
+from PIL import Image, ImageStat
+
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import GdkPixbuf
+
+
+DEFAULT_COLOR = (1, 1, 1)
+# Anything bigger is shrunk first, the average barely moves and it keeps the
+# reduction cheap for full size covers.
+SAMPLE_SIZE = 64
+
+# pixbuf -> (r, g, b), entries go away with the pixbuf
+_average_colors = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_average_color(pixbuf: GdkPixbuf.Pixbuf | None) -> tuple[float, float, float]:
+    """Average color of the opaque pixels of ``pixbuf`` as 0..1 floats, memoized per pixbuf."""
+    if pixbuf is None:
+        return DEFAULT_COLOR
+    with _lock:
+        if pixbuf in _average_colors:
+            return _average_colors[pixbuf]
+    color = _compute_average_color(pixbuf)
+    with _lock:
+        _average_colors[pixbuf] = color
+    return color
+
+
+def _compute_average_color(pixbuf: GdkPixbuf.Pixbuf) -> tuple[float, float, float]:
+    if pixbuf.get_width() > SAMPLE_SIZE or pixbuf.get_height() > SAMPLE_SIZE:
+        pixbuf = pixbuf.scale_simple(SAMPLE_SIZE, SAMPLE_SIZE, GdkPixbuf.InterpType.TILES)
+    has_alpha = pixbuf.get_has_alpha()
+    mode = "RGBA" if has_alpha else "RGB"
+    img = Image.frombuffer(
+        mode,
+        (pixbuf.get_width(), pixbuf.get_height()),
+        pixbuf.get_pixels(),
+        "raw",
+        mode,
+        pixbuf.get_rowstride(),
+        1,
+    )
+    if has_alpha:
+        # fully transparent pixels (e.g. rounded corners) don't count
+        stat = ImageStat.Stat(img.convert("RGB"), img.getchannel("A"))
+    else:
+        stat = ImageStat.Stat(img)
+    if not stat.count[0]:
+        return DEFAULT_COLOR
+    r, g, b = stat.mean[:3]
+    return (r / 255.0, g / 255.0, b / 255.0)
@@ -30,27 +30,91 @@ warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 
 class HyprlandWithMonitors(Hyprland):
+    """Hyprland service that keeps the monitor topology cached.
+
+    The Hyprland id <-> name <-> GDK index mapping, geometry and transform are
+    read once and only re-read after a monitor is added or removed, on either
+    the Hyprland or the GDK side; the active workspaces are re-read after a
+    switch to a workspace that wasn't shown. The focused monitor is followed
+    through ``focusedmon`` events, so lookups don't go through the socket.
+    """
+
     def __init__(self, commands_only: bool = False, **kwargs):
         self.display: Gdk.Display = Gdk.Display.get_default()
         super().__init__(commands_only, **kwargs)
+        self._commands_only = commands_only
+        self._monitors: Dict[int, Dict] | None = None
+        self._gdk_ids: Dict[str, int] | None = None
+        self._focused_monitor: str | None = None
+        self.display.connect("monitor-added", self._invalidate)
+        self.display.connect("monitor-removed", self._invalidate)
+        if not commands_only:
+            self.connect("event::monitoradded", self._invalidate)
+            self.connect("event::monitorremoved", self._invalidate)
+            self.connect("event::focusedmon", self._on_focused_monitor)
+            self.connect("event::workspacev2", self._on_workspace)
+            # Which monitor a moved workspace ends up active on isn't reported
+            self.connect("event::moveworkspacev2", self._invalidate)
+
+    def _invalidate(self, *_):
+        self._monitors = None
+        self._gdk_ids = None
+
+    def _on_focused_monitor(self, _, event):
+        self._focused_monitor = event.data[0]
+
+    def _on_workspace(self, _, event):
+        # Focus moving to a workspace that is already shown changes nothing.
+        # Otherwise re-read on the next lookup: the event doesn't say which
+        # monitor switched, and focusedmon may arrive after it.
+        if self._monitors is None:
+            return
+        workspace_id = int(event.data[0])
+        if not any(monitor["active_workspace"] == workspace_id for monitor in self._monitors.values()):
+            self._monitors = None
+
+    def get_monitors(self) -> Dict[int, Dict]:
+        """Hyprland monitor id -> name, gdk_id, x, y, width, height, scale, transform and active_workspace."""
+        if self._monitors is None:
+            gdk_ids = self._get_gdk_ids()
+            self._monitors = {
+                monitor["id"]: {
+                    "name": monitor["name"],
+                    "gdk_id": gdk_ids.get(monitor["name"]),
+                    "x": monitor["x"],
+                    "y": monitor["y"],
+                    "width": monitor["width"],
+                    "height": monitor["height"],
+                    "scale": monitor["scale"],
+                    "transform": monitor["transform"],
+                    "active_workspace": monitor["activeWorkspace"]["id"],
+                }
+                for monitor in json.loads(self.send_command("j/monitors").reply)
+            }
+        return self._monitors
+
+    def _get_gdk_ids(self) -> Dict[str, int]:
+        if self._gdk_ids is None:
+            screen = self.display.get_default_screen()
+            self._gdk_ids = {
+                screen.get_monitor_plug_name(i): i
+                for i in range(self.display.get_n_monitors())
+            }
+        return self._gdk_ids
 
     # Add new arguments
     def get_all_monitors(self) -> Dict:
-        monitors = json.loads(self.send_command("j/monitors").reply)
-        return {monitor["id"]: monitor["name"] for monitor in monitors}
+        return {monitor_id: monitor["name"] for monitor_id, monitor in self.get_monitors().items()}
 
     def get_gdk_monitor_id_from_name(self, plug_name: str) -> int | None:
-        for i in range(self.display.get_n_monitors()):
-            if self.display.get_default_screen().get_monitor_plug_name(i) == plug_name:
-                return i
-        return None
+        return self._get_gdk_ids().get(plug_name)
 
     def get_gdk_monitor_id(self, hyprland_id: int) -> int | None:
-        monitors = self.get_all_monitors()
-        if hyprland_id in monitors:
-            return self.get_gdk_monitor_id_from_name(monitors[hyprland_id])
-        return None
+        monitor = self.get_monitors().get(hyprland_id)
+        return monitor["gdk_id"] if monitor else None
 
     def get_current_gdk_monitor_id(self) -> int | None:
-        active_workspace = json.loads(self.send_command("j/activeworkspace").reply)
-        return self.get_gdk_monitor_id_from_name(active_workspace["monitor"])
+        if self._focused_monitor is None or self._commands_only:
+            active_workspace = json.loads(self.send_command("j/activeworkspace").reply)
+            self._focused_monitor = active_workspace["monitor"]
+        return self.get_gdk_monitor_id_from_name(self._focused_monitor)
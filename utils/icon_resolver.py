@@ -1,11 +1,13 @@
+import atexit
 import json
 import os
 import re
+from collections import OrderedDict
 
 import gi
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import GLib, Gtk
+from gi.repository import GdkPixbuf, GLib, Gtk
 from loguru import logger
 
 
@@ -18,23 +20,189 @@ from loguru import logger
 
 CACHE_DIR = str(GLib.get_user_cache_dir()) + "/fabric"
 ICON_CACHE_FILE = CACHE_DIR + "/icons.json"
+ICON_CACHE_VERSION = 2
+# Seconds to wait for more new icons before writing the cache
+ICON_CACHE_FLUSH_DELAY = 5
+# Decoded pixbufs kept in memory, keyed by (app id, size, scale)
+PIXBUF_CACHE_SIZE = 128
+
+_default_resolver = None
 if not os.path.exists(CACHE_DIR):
     os.makedirs(CACHE_DIR)
 
 
+def _read_desktop_entry(path: str) -> dict[str, str]:
+    # Keys of the [Desktop Entry] group only, actions have their own Icon=
+    entry = {}
+    in_group = False
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    if in_group:
+                        break
+                    in_group = line == "[Desktop Entry]"
+                elif in_group and "=" in line:
+                    key, value = line.split("=", 1)
+                    entry.setdefault(key.strip(), value.strip())
+    except OSError:
+        pass
+    return entry
+
+
+def _exec_name(command: str) -> str | None:
+    for token in command.split():
+        if token == "env" or "=" in token:
+            continue  # env VAR=value prefixes
+        return os.path.basename(token.strip('"'))
+    return None
+
+
+class DesktopIconIndex:
+    """Maps StartupWMClass, desktop id, Exec name and Name (lowercased) to the entry's icon.
+
+    Built on first use from the user and system applications directories, in
+    XDG precedence order, and rebuilt when one of their mtimes changes.
+    """
+
+    def __init__(self):
+        self._index: dict[str, str] | None = None
+        self._mtimes: dict[str, float] = {}
+
+    def _directories(self) -> list[str]:
+        return [
+            os.path.join(data_dir, "applications")
+            for data_dir in [GLib.get_user_data_dir(), *GLib.get_system_data_dirs()]
+        ]
+
+    def _current_mtimes(self) -> dict[str, float]:
+        mtimes = {}
+        for directory in self._directories():
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime
+            except OSError:
+                pass
+        return mtimes
+
+    def get(self) -> dict[str, str]:
+        mtimes = self._current_mtimes()
+        if self._index is None or mtimes != self._mtimes:
+            self._mtimes = mtimes
+            self._index = self._build(mtimes)
+        return self._index
+
+    def _build(self, directories) -> dict[str, str]:
+        by_id: dict[str, dict] = {}
+        for directory in directories:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if not name.endswith(".desktop"):
+                        continue
+                    path = os.path.join(root, name)
+                    desktop_id = os.path.relpath(path, directory)[: -len(".desktop")].replace(os.sep, "-")
+                    if desktop_id not in by_id:  # earlier directories take precedence
+                        by_id[desktop_id] = _read_desktop_entry(path)
+
+        # Several keys may collide: the explicit window class wins over the
+        # desktop id, which wins over the executable and display names
+        index = {}
+        for field in ("Name", "Exec", "id", "StartupWMClass"):
+            tier = {}
+            for desktop_id, entry in by_id.items():
+                icon = entry.get("Icon")
+                if not icon:
+                    continue
+                if field == "id":
+                    value = desktop_id
+                elif field == "Exec":
+                    value = _exec_name(entry.get("Exec", ""))
+                else:
+                    value = entry.get(field)
+                if value:
+                    # by_id is in directory order, the first entry for a key wins
+                    tier.setdefault("".join(value.lower().split()), "".join(icon.split()))
+            index.update(tier)
+        logger.info(f"[ICONS] indexed {len(by_id)} desktop entries")
+        return index
+
+
 class IconResolver:
     def __init__(self, default_applicaiton_icon: str = "application-x-executable-symbolic"):
-        if os.path.exists(ICON_CACHE_FILE):
-            f = open(ICON_CACHE_FILE)
-            try:
-                self._icon_dict = json.load(f)
-            except json.JSONDecodeError:
-                logger.info("[ICONS] Cache file does not exist or is corrupted")
-            f.close()
-        else:
-            self._icon_dict = {}
+        self._settings = Gtk.Settings.get_default()
+        self._icon_dict = self._load_cache()
+        self._dirty = False  # changed since the last write
+        self._flush_id = None
 
         self.default_applicaiton_icon = default_applicaiton_icon
+        self._desktop_index = DesktopIconIndex()
+        # Resolved names are only valid for the theme they were resolved against
+        self._settings.connect("notify::gtk-icon-theme-name", self._on_theme_changed)
+        # Decoded icons, shared by everything going through this resolver
+        self._pixbufs: OrderedDict[tuple[str, int, int], GdkPixbuf.Pixbuf] = OrderedDict()
+        self.pixbuf_hits = 0
+        self.pixbuf_misses = 0
+        Gtk.IconTheme.get_default().connect("changed", self._on_icon_theme_changed)
+        atexit.register(self.flush)
+
+    def _theme_name(self) -> str:
+        return self._settings.props.gtk_icon_theme_name or ""
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(ICON_CACHE_FILE) as f:
+                cache = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.info("[ICONS] Cache file is corrupted, starting over")
+            return {}
+        if (
+            not isinstance(cache, dict)
+            or cache.get("version") != ICON_CACHE_VERSION
+            or cache.get("theme") != self._theme_name()
+            or not isinstance(cache.get("icons"), dict)
+        ):
+            logger.info("[ICONS] Cache is from another version or icon theme, starting over")
+            return {}
+        return cache["icons"]
+
+    def _on_theme_changed(self, *_):
+        self._icon_dict = {}
+        self._dirty = True
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_id is None:
+            self._flush_id = GLib.timeout_add_seconds(ICON_CACHE_FLUSH_DELAY, self._on_flush_timeout)
+
+    def _on_flush_timeout(self):
+        self._flush_id = None
+        self.flush()
+        return False
+
+    def flush(self):
+        """Write the cache out now, atomically, if anything changed."""
+        if self._flush_id is not None:
+            GLib.source_remove(self._flush_id)
+            self._flush_id = None
+        if not self._dirty:
+            return
+        tmp = ICON_CACHE_FILE + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(
+                    {
+                        "version": ICON_CACHE_VERSION,
+                        "theme": self._theme_name(),
+                        "icons": self._icon_dict,
+                    },
+                    f,
+                )
+            os.replace(tmp, ICON_CACHE_FILE)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"[ICONS] Could not write the cache: {e}")
 
     def get_icon_name(self, app_id: str):
         if app_id in self._icon_dict:
@@ -46,46 +214,51 @@ class IconResolver:
         self._store_new_icon(app_id, new_icon)
         return new_icon
 
-    def get_icon_pixbuf(self, app_id: str, size: int = 16):
-        return Gtk.IconTheme.get_default().load_icon(
+    def get_icon_pixbuf(self, app_id: str, size: int = 16, scale: int = 1):
+        key = (app_id, size, scale)
+        pixbuf = self._pixbufs.get(key)
+        if pixbuf is not None:
+            self._pixbufs.move_to_end(key)
+            self.pixbuf_hits += 1
+            return pixbuf
+        self.pixbuf_misses += 1
+        pixbuf = Gtk.IconTheme.get_default().load_icon_for_scale(
             self.get_icon_name(app_id),
             size,
+            scale,
             Gtk.IconLookupFlags.FORCE_SIZE,
         )
+        self._pixbufs[key] = pixbuf
+        if len(self._pixbufs) > PIXBUF_CACHE_SIZE:
+            self._pixbufs.popitem(last=False)
+        return pixbuf
+
+    def pixbuf_cache_stats(self) -> dict[str, int]:
+        return {
+            "hits": self.pixbuf_hits,
+            "misses": self.pixbuf_misses,
+            "size": len(self._pixbufs),
+        }
+
+    def _on_icon_theme_changed(self, *_):
+        self._pixbufs.clear()
 
     def _store_new_icon(self, app_id: str, icon: str):
+        # New entries are written in batches, see flush()
         self._icon_dict[app_id] = icon
-        with open(ICON_CACHE_FILE, "w") as f:
-            json.dump(self._icon_dict, f)
-            f.close()
-
-    def _get_icon_from_desktop_file(self, desktop_file_path: str):
-        # TODO: get icon in the [Desktop Entry] section only
-        with open(desktop_file_path) as f:
-            for line in f.readlines():
-                if "Icon=" in line:
-                    return "".join(line[5:].split())
-            return self.default_applicaiton_icon
-
-    def _get_desktop_file(self, app_id: str) -> str | None:
-        data_dirs = GLib.get_system_data_dirs()
-        for data_dir in data_dirs:
-            data_dir = data_dir + "/applications/"
-            if os.path.exists(data_dir):
-                # Do name resolving here
-
-                files = os.listdir(data_dir)
-                matching = [
-                    s for s in files if "".join(app_id.lower().split()) in s.lower()
-                ]
-                if matching:
-                    return data_dir + matching[0]
-
-                for word in list(filter(None, re.split(r"-|\.|_|\s", app_id))):
-                    matching = [s for s in files if word.lower() in s.lower()]
-                    if matching:
-                        return data_dir + matching[0]
+        self._dirty = True
+        self._schedule_flush()
 
+    def _get_icon_from_desktop_entries(self, app_id: str) -> str | None:
+        # Exact lookups only: the id itself, then each of its words
+        # ("org.gnome.Nautilus" -> "nautilus")
+        index = self._desktop_index.get()
+        key = "".join(app_id.lower().split())
+        if key in index:
+            return index[key]
+        for word in filter(None, re.split(r"-|\.|_|\s", app_id)):
+            if word.lower() in index:
+                return index[word.lower()]
         return None
 
     def _compositor_find_icon(self, app_id: str):
@@ -93,9 +266,12 @@ class IconResolver:
             return app_id
         if Gtk.IconTheme.get_default().has_icon(app_id + "-desktop"):
             return app_id + "-desktop"
-        desktop_file = self._get_desktop_file(app_id)
-        return (
-            self._get_icon_from_desktop_file(desktop_file)
-            if desktop_file
-            else self.default_applicaiton_icon
-        )
+        return self._get_icon_from_desktop_entries(app_id) or self.default_applicaiton_icon
+
+
+def get_icon_resolver() -> IconResolver:
+    """The resolver shared across the shell, so decoded icons are too."""
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = IconResolver()
+    return _default_resolver
@@ -0,0 +1,87 @@
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import gi
+
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import GdkPixbuf, GLib
+from loguru import logger
+
+# Decodes images on worker threads, straight at the size they are shown at.
+#
+# Files go through new_from_file_at_scale, which lets loaders such as JPEG
+# decode at a reduced size instead of producing the full image first. Results
+# are cached by (path, mtime, size), so an icon edited on disk is picked up
+# again. Callbacks always run on the main loop.
+
+
+class ImageLoader:
+    def __init__(self, max_entries: int = 64, max_workers: int = 2):
+        self.max_entries = max_entries
+        self._cache: OrderedDict[tuple, GdkPixbuf.Pixbuf] = OrderedDict()
+        self._pending: dict[tuple, list[Callable]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-loader")
+
+    def load_file(
+        self,
+        path: str,
+        width: int,
+        height: int,
+        callback: Callable[[GdkPixbuf.Pixbuf | None], None],
+    ) -> GdkPixbuf.Pixbuf | None:
+        """Return the cached pixbuf for ``path`` at ``width`` x ``height``.
+
+        On a miss, None is returned and ``callback`` gets the pixbuf (or None
+        if it can't be loaded) once it is decoded.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            logger.warning(f"Image path does not exist: {path}")
+            return None
+        key = (path, mtime, width, height)
+        with self._lock:
+            pixbuf = self._cache.get(key)
+            if pixbuf is not None:
+                self._cache.move_to_end(key)
+                return pixbuf
+            if key in self._pending:
+                self._pending[key].append(callback)
+                return None
+            self._pending[key] = [callback]
+        self._executor.submit(self._decode_file, key)
+        return None
+
+    def scale(
+        self,
+        pixbuf: GdkPixbuf.Pixbuf,
+        width: int,
+        height: int,
+        callback: Callable[[GdkPixbuf.Pixbuf | None], None],
+    ):
+        """Scale an already decoded pixbuf off the main thread, not cached."""
+        def work():
+            scaled = pixbuf.scale_simple(width, height, GdkPixbuf.InterpType.BILINEAR)
+            GLib.idle_add(lambda: callback(scaled) and False)
+
+        self._executor.submit(work)
+
+    def _decode_file(self, key: tuple):
+        path, _, width, height = key
+        try:
+            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(path, width, height, False)
+        except Exception as e:
+            logger.error(f"Failed to load image {path}: {e}")
+            pixbuf = None
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+            if pixbuf is not None:
+                self._cache[key] = pixbuf
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        for callback in callbacks:
+            GLib.idle_add(lambda callback=callback: callback(pixbuf) and False)
@@ -0,0 +1,115 @@
+import heapq
+import os
+import threading
+import time
+
+from loguru import logger
+
+# Launch history for the app launcher, ranked by frecency: every launch adds 1
+# to an app's score, and scores halve every HALF_LIFE seconds.
+#
+# The file is an append-only log, one line per launch:
+#     L <timestamp> <desktop id>
+# Compaction rewrites it as one snapshot line per app:
+#     S <timestamp> <launch count> <score at timestamp> <desktop id>
+# so it stays a few hundred short lines at most. It is read on first use, not
+# at startup.
+
+HISTORY_FILE = os.path.expanduser("~/.cache/ax-shell/launcher/history.log")
+HALF_LIFE = 7 * 24 * 3600
+# Compact once the log holds this many lines more than there are apps in it
+COMPACT_SLACK = 256
+
+
+class LaunchHistory:
+    def __init__(self, path: str = HISTORY_FILE, half_life: float = HALF_LIFE):
+        self.path = path
+        self.half_life = half_life
+        self._entries: dict[str, list] = {}  # desktop id -> [count, score, timestamp]
+        self._lines = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def record(self, desktop_id: str, when: float | None = None):
+        when = time.time() if when is None else when
+        with self._lock:
+            self._ensure_loaded()
+            self._apply_launch(desktop_id, when)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(f"L {when:.0f} {desktop_id}\n")
+                self._lines += 1
+            except OSError as e:
+                logger.warning(f"[Launcher] could not write launch history: {e}")
+                return
+            if self._lines > len(self._entries) + COMPACT_SLACK:
+                self._compact()
+
+    def score(self, desktop_id: str, now: float | None = None) -> float:
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(desktop_id)
+            if entry is None:
+                return 0.0
+            return self._decayed(entry, time.time() if now is None else now)
+
+    def count(self, desktop_id: str) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._entries.get(desktop_id)
+            return entry[0] if entry else 0
+
+    def top(self, n: int, now: float | None = None) -> list[str]:
+        """The ``n`` desktop ids with the highest frecency, best first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._ensure_loaded()
+            return heapq.nlargest(
+                n, self._entries, key=lambda desktop_id: self._decayed(self._entries[desktop_id], now)
+            )
+
+    def _decayed(self, entry: list, now: float) -> float:
+        _, score, timestamp = entry
+        return score * 2 ** (-max(now - timestamp, 0) / self.half_life)
+
+    def _apply_launch(self, desktop_id: str, when: float):
+        entry = self._entries.get(desktop_id)
+        if entry is None:
+            self._entries[desktop_id] = [1, 1.0, when]
+        else:
+            entry[1] = self._decayed(entry, when) + 1
+            entry[0] += 1
+            entry[2] = max(entry[2], when)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    self._lines += 1
+                    parts = line.rstrip("\n").split(" ", 4)
+                    try:
+                        if parts[0] == "L" and len(parts) == 3:
+                            self._apply_launch(parts[2], float(parts[1]))
+                        elif parts[0] == "S" and len(parts) == 5:
+                            self._entries[parts[4]] = [int(parts[2]), float(parts[3]), float(parts[1])]
+                    except (ValueError, IndexError):
+                        continue  # torn or foreign line, skip it
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[Launcher] could not read launch history: {e}")
+
+    def _compact(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                for desktop_id, (count, score, timestamp) in self._entries.items():
+                    f.write(f"S {timestamp:.0f} {count} {score:.6g} {desktop_id}\n")
+            os.replace(tmp, self.path)
+            self._lines = len(self._entries)
+        except OSError as e:
+            logger.warning(f"[Launcher] could not compact launch history: {e}")
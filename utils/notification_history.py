@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+# On-disk notification history.
+#
+# Records are appended as JSON lines, so saving one is a single small write.
+# The file is scanned once, on first read, into an index of line offsets plus
+# a casefolded search text per record: paging seeks straight to the records it
+# returns and search never touches the disk until it has its matches. Once the
+# file outgrows MAX_BYTES it is rewritten with only the newest records that fit
+# in KEEP_BYTES.
+#
+# append() and clear() return at once: they run in order on a single worker
+# thread, so neither the write nor the first scan of the file ever blocks the
+# main loop. Reads take the same lock and see every write that has completed.
+
+HISTORY_FILE = os.path.expanduser("~/.cache/ax-shell/notifications/history.jsonl")
+MAX_BYTES = 2 * 1024 * 1024
+KEEP_BYTES = 1024 * 1024
+
+
+class NotificationHistory:
+    def __init__(self, path: str = HISTORY_FILE, max_bytes: int = MAX_BYTES, keep_bytes: int = KEEP_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep_bytes = keep_bytes
+        self._offsets: list[int] | None = None  # oldest first
+        self._texts: list[str] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notification-history")
+
+    def append(self, app_name: str, summary: str, body: str = "", app_icon: str = "", notification_id: int = 0):
+        """Queue a record for writing, stamped with the current time."""
+        record = {
+            "id": notification_id,
+            "time": time.time(),
+            "app": app_name,
+            "summary": summary,
+            "body": body,
+            "icon": app_icon,
+        }
+        self._executor.submit(self._append, record)
+
+    def _append(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._ensure_index()
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "ab") as f:
+                    data = line.encode("utf-8")
+                    f.write(data)
+            except OSError as e:
+                logger.warning(f"[Notifications] could not save to history: {e}")
+                return
+            self._offsets.append(self._size)
+            self._texts.append(self._search_text(record))
+            self._size += len(data)
+            if self._size > self.max_bytes:
+                self._compact()
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_index()
+            return len(self._offsets)
+
+    def page(self, start: int = 0, count: int = 20) -> list[dict]:
+        """Records ``start`` to ``start + count``, newest first."""
+        with self._lock:
+            self._ensure_index()
+            total = len(self._offsets)
+            indices = range(total - 1 - start, max(total - 1 - start - count, -1), -1)
+            return self._read(indices)
+
+    def search(self, query: str, limit: int = 50) -> list[dict]:
+        """Up to ``limit`` records whose app, summary or body contain ``query``, newest first."""
+        query = query.casefold()
+        with self._lock:
+            self._ensure_index()
+            matches = []
+            for i in range(len(self._texts) - 1, -1, -1):
+                if query in self._texts[i]:
+                    matches.append(i)
+                    if len(matches) >= limit:
+                        break
+            return self._read(matches)
+
+    def clear(self):
+        self._executor.submit(self._clear)
+
+    def _clear(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self._offsets, self._texts, self._size = [], [], 0
+
+    @staticmethod
+    def _search_text(record: dict) -> str:
+        return f"{record.get('app', '')}\n{record.get('summary', '')}\n{record.get('body', '')}".casefold()
+
+    def _ensure_index(self):
+        if self._offsets is not None:
+            return
+        self._offsets, self._texts, self._size = [], [], 0
+        try:
+            with open(self.path, "rb") as f:
+                offset = 0
+                for raw in f:
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        record = None  # torn write, skipped but kept in place
+                    if isinstance(record, dict):
+                        self._offsets.append(offset)
+                        self._texts.append(self._search_text(record))
+                    offset += len(raw)
+                self._size = offset
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[Notifications] could not read history: {e}")
+
+    def _read(self, indices) -> list[dict]:
+        records = []
+        try:
+            with open(self.path, "rb") as f:
+                for i in indices:
+                    f.seek(self._offsets[i])
+                    records.append(json.loads(f.readline()))
+        except (OSError, ValueError) as e:
+            logger.warning(f"[Notifications] could not read history: {e}")
+        return records
+
+    def _compact(self):
+        # Keep the newest records that fit in keep_bytes
+        keep_from = len(self._offsets)
+        while keep_from > 0 and self._size - self._offsets[keep_from - 1] <= self.keep_bytes:
+            keep_from -= 1
+        if keep_from == 0:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+                src.seek(self._offsets[keep_from])
+                dst.write(src.read())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"[Notifications] could not compact history: {e}")
+            return
+        base = self._offsets[keep_from]
+        self._offsets = [offset - base for offset in self._offsets[keep_from:]]
+        self._texts = self._texts[keep_from:]
+        self._size -= base
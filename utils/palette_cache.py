@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import toml
+from loguru import logger
+
+# Cache of matugen results keyed by (image content, scheme, matugen setup).
+#
+# An entry is a directory holding the rendered output of every matugen template
+# plus a meta.json. On a hit, applying a wallpaper/scheme pair just writes the
+# cached files back, sets the wallpaper and runs the post hooks, skipping the
+# color extraction entirely. On a miss matugen runs as usual and its outputs are
+# snapshotted afterwards. Pre-generation renders into the cache only, through a
+# private matugen config, so it has no visible side effects.
+#
+# Replays don't signal matugen's reload_apps targets (kitty, gtk...), only the
+# templates' own post hooks are run.
+
+PALETTE_CACHE_DIR = os.path.expanduser("~/.cache/ax-shell/palettes")
+MATUGEN_CONFIG = os.path.expanduser("~/.config/matugen/config.toml")
+DEFAULT_SCHEME = "scheme-tonal-spot"
+
+
+class PaletteCache:
+    def __init__(self, cache_dir: str = PALETTE_CACHE_DIR, config_path: str = MATUGEN_CONFIG):
+        self.cache_dir = cache_dir
+        self.config_path = config_path
+        os.makedirs(cache_dir, exist_ok=True)
+        # applies run in order so quick scheme switches land on the last one
+        self._apply_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="palette-apply")
+        self._pregenerate_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="palette-pregen")
+        self._hashes: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, image_path: str, scheme: str) -> Future:
+        return self._apply_executor.submit(self._apply, image_path, scheme)
+
+    def pregenerate(self, image_path: str, scheme: str = DEFAULT_SCHEME) -> Future:
+        return self._pregenerate_executor.submit(self._pregenerate, image_path, scheme)
+
+    def _apply(self, image_path: str, scheme: str):
+        config = self._load_config()
+        entry = self._entry_dir(image_path, scheme, config)
+        if entry and os.path.isdir(entry):
+            try:
+                self._replay(entry, image_path, config)
+                logger.info(f"[Palette] replayed cached {scheme} for {image_path}")
+                return
+            except Exception as e:
+                logger.warning(f"[Palette] replay failed, regenerating: {e}")
+        subprocess.run(["matugen", "image", image_path, "-t", scheme], check=False)
+        if entry:
+            self._snapshot(entry, image_path, config)
+
+    def _pregenerate(self, image_path: str, scheme: str):
+        config = self._load_config()
+        entry = self._entry_dir(image_path, scheme, config)
+        if not entry or os.path.isdir(entry):
+            return
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix=".pregen-")
+        try:
+            outputs = {}
+            templates = {}
+            for name, template in config.get("templates", {}).items():
+                if "input_path" not in template or "output_path" not in template:
+                    continue
+                outputs[name] = template["output_path"]
+                templates[name] = {
+                    # The private config lives elsewhere, relative inputs would move with it
+                    "input_path": self._input_path(template),
+                    "output_path": os.path.join(tmp, name),
+                }
+            # Same settings as a real run (custom colors and the like), so the
+            # output matches the fingerprint; only setting the wallpaper is left out
+            settings = {key: value for key, value in config.get("config", {}).items() if key != "wallpaper"}
+            private_config = os.path.join(tmp, "config.toml")
+            with open(private_config, "w") as f:
+                toml.dump({**config, "config": settings, "templates": templates}, f)
+            subprocess.run(
+                ["matugen", "image", image_path, "-t", scheme, "-c", private_config],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            os.remove(private_config)
+            self._write_meta(tmp, image_path, outputs)
+            self._commit(tmp, entry)
+            logger.info(f"[Palette] pre-generated {scheme} for {image_path}")
+        except Exception as e:
+            logger.warning(f"[Palette] pre-generation failed for {image_path}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _snapshot(self, entry: str, image_path: str, config: dict):
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix=".snapshot-")
+        try:
+            outputs = {}
+            for name, template in config.get("templates", {}).items():
+                output = template.get("output_path")
+                if not output or not os.path.isfile(os.path.expanduser(output)):
+                    continue
+                shutil.copyfile(os.path.expanduser(output), os.path.join(tmp, name))
+                outputs[name] = output
+            self._write_meta(tmp, image_path, outputs)
+            self._commit(tmp, entry)
+        except Exception as e:
+            logger.warning(f"[Palette] could not cache matugen output: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _replay(self, entry: str, image_path: str, config: dict):
+        with open(os.path.join(entry, "meta.json")) as f:
+            meta = json.load(f)
+        for name, output in meta["outputs"].items():
+            with open(os.path.join(entry, name)) as f:
+                content = f.read()
+            if meta["image"] != image_path:
+                # same picture under another name, templates may embed the path
+                content = content.replace(meta["image"], image_path)
+            output = os.path.expanduser(output)
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            tmp = f"{output}.ax-tmp"
+            with open(tmp, "w") as f:
+                f.write(content)
+            os.replace(tmp, output)
+
+        wallpaper = config.get("config", {}).get("wallpaper", {})
+        if wallpaper.get("set") and wallpaper.get("command"):
+            subprocess.Popen([wallpaper["command"], *wallpaper.get("arguments", []), image_path])
+        for name in meta["outputs"]:
+            hook = config.get("templates", {}).get(name, {}).get("post_hook")
+            if hook:
+                subprocess.Popen(hook, shell=True)
+
+    def _entry_dir(self, image_path: str, scheme: str, config: dict) -> str | None:
+        digest = self._content_hash(image_path)
+        if not digest:
+            return None
+        return os.path.join(self.cache_dir, f"{digest}-{scheme}-{self._config_fingerprint(config)}")
+
+    def _content_hash(self, image_path: str) -> str | None:
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        key = (image_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._hashes:
+                return self._hashes[key]
+        h = hashlib.blake2b(digest_size=16)
+        with open(image_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._hashes[key] = digest
+        return digest
+
+    def _config_fingerprint(self, config: dict) -> str:
+        # Edits to the matugen config or any template invalidate the cached renders
+        h = hashlib.blake2b(digest_size=6)
+        h.update(json.dumps(config, sort_keys=True, default=str).encode())
+        for template in config.get("templates", {}).values():
+            try:
+                h.update(str(os.stat(self._input_path(template)).st_mtime_ns).encode())
+            except (KeyError, OSError):
+                pass
+        return h.hexdigest()
+
+    def _input_path(self, template: dict) -> str:
+        # matugen resolves relative template paths against its config's directory
+        path = os.path.expanduser(template["input_path"])
+        return os.path.join(os.path.dirname(self.config_path), path)
+
+    def _load_config(self) -> dict:
+        try:
+            with open(self.config_path) as f:
+                return toml.load(f)
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _write_meta(directory: str, image_path: str, outputs: dict):
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"image": image_path, "outputs": outputs}, f)
+
+    @staticmethod
+    def _commit(tmp: str, entry: str):
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # raced with another writer for the same entry, theirs is as good
+            shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,81 @@
+from collections.abc import Callable
+
+from gi.repository import GLib
+
+
+class Subscription:
+    def __init__(self, callback: Callable, period_ms: int, when: Callable[[], bool] | None):
+        self.callback = callback
+        self.period_ms = period_ms
+        self.when = when
+        self.source_id: int | None = None
+
+
+class TickScheduler:
+    """Runs periodic callbacks only while their ``when`` predicate holds.
+
+    Subscriptions are keyed by callback, so registering the same callback twice
+    keeps a single timer (at the shorter period). Predicates are re-evaluated on
+    ``refresh()``, which owners call whenever visibility may have changed
+    (stack child switched, window hidden, playback started...). A callback
+    returning False unsubscribes itself, like a GLib source.
+    """
+
+    def __init__(self, active: bool = True):
+        self._subscriptions: dict[Callable, Subscription] = {}
+        self._active = active
+
+    def subscribe(
+        self,
+        callback: Callable[[], bool],
+        period_ms: int,
+        when: Callable[[], bool] | None = None,
+    ) -> Callable:
+        existing = self._subscriptions.get(callback)
+        if existing:
+            if period_ms < existing.period_ms:
+                existing.period_ms = period_ms
+                self._stop(existing)
+            if when is not None:
+                existing.when = when
+        else:
+            self._subscriptions[callback] = Subscription(callback, period_ms, when)
+        self.refresh()
+        return callback
+
+    def unsubscribe(self, callback: Callable):
+        sub = self._subscriptions.pop(callback, None)
+        if sub:
+            self._stop(sub)
+
+    def set_active(self, active: bool):
+        self._active = active
+        self.refresh()
+
+    def refresh(self):
+        for sub in list(self._subscriptions.values()):
+            if self._active and (sub.when is None or sub.when()):
+                if sub.source_id is None:
+                    # catch up right away, the value may be stale after a pause
+                    if sub.callback() is False:
+                        self.unsubscribe(sub.callback)
+                        continue
+                    sub.source_id = GLib.timeout_add(sub.period_ms, self._tick, sub)
+            else:
+                self._stop(sub)
+
+    @property
+    def running(self) -> int:
+        return sum(1 for sub in self._subscriptions.values() if sub.source_id is not None)
+
+    def _tick(self, sub: Subscription) -> bool:
+        if sub.callback() is False:
+            sub.source_id = None
+            self._subscriptions.pop(sub.callback, None)
+            return False
+        return True
+
+    def _stop(self, sub: Subscription):
+        if sub.source_id is not None:
+            GLib.source_remove(sub.source_id)
+            sub.source_id = None
@@ -0,0 +1,77 @@
+from collections.abc import Callable
+
+from gi.repository import Gdk, GLib
+
+# Turns scroll events into value changes without flooding the backend.
+#
+# Deltas, smooth ones included, are summed into a target value and written once
+# per frame; targets superseded within the frame are never written. While a
+# gesture is going on the target keeps building on itself instead of re-reading
+# the backend, which may not have caught up yet. After BURST_END_MS of quiet the
+# next gesture starts from the backend's value again.
+
+FRAME_MS = 16
+BURST_END_MS = 300
+
+
+class _Channel:
+    def __init__(self, read, write, step, lower, upper):
+        self.read = read
+        self.write = write
+        self.step = step
+        self.lower = lower
+        self.upper = upper
+        self.target: float | None = None
+        self.written: int | None = None
+        self.last_event = 0
+
+
+class ScrollController:
+    def __init__(self):
+        self._channels: list[_Channel] = []
+        self._flush_id = None
+
+    def attach(
+        self,
+        widget,
+        read: Callable[[], float],
+        write: Callable[[int], None],
+        step: float = 5,
+        lower: float = 0,
+        upper: float = 100,
+    ):
+        """Scrolling up over ``widget`` raises the value by ``step`` per wheel notch."""
+        widget.add_events(Gdk.EventMask.SCROLL_MASK | Gdk.EventMask.SMOOTH_SCROLL_MASK)
+        channel = _Channel(read, write, step, lower, upper)
+        self._channels.append(channel)
+        widget.connect("scroll-event", lambda _, event: self._on_scroll(channel, event))
+
+    def _on_scroll(self, channel: _Channel, event) -> bool:
+        if event.direction == Gdk.ScrollDirection.UP:
+            dy = -1.0
+        elif event.direction == Gdk.ScrollDirection.DOWN:
+            dy = 1.0
+        elif event.direction == Gdk.ScrollDirection.SMOOTH:
+            _, _, dy = event.get_scroll_deltas()
+        else:
+            return False
+        now = GLib.get_monotonic_time()
+        if channel.target is None or now - channel.last_event > BURST_END_MS * 1000:
+            channel.target = channel.read()
+            channel.written = round(channel.target)
+        channel.last_event = now
+        channel.target = max(channel.lower, min(channel.upper, channel.target - dy * channel.step))
+        if self._flush_id is None:
+            self._flush_id = GLib.timeout_add(FRAME_MS, self._flush)
+        return True
+
+    def _flush(self):
+        self._flush_id = None
+        for channel in self._channels:
+            if channel.target is None:
+                continue
+            value = round(channel.target)
+            if value != channel.written:
+                channel.written = value
+                channel.write(value)
+        return False
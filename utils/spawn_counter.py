@@ -0,0 +1,53 @@
+import sys
+import threading
+from collections import Counter
+
+# Counts the child processes started from python code, so idle paths can be
+# checked to stay at zero, e.g.:
+#   fabric-cli exec ax-shell "from utils.spawn_counter import spawn_count; spawn_count()"
+#
+# This relies on audit hooks (PEP 578), so processes spawned through
+# Gio.Subprocess (fabric's exec_shell_command*) are not seen here.
+
+_SPAWN_EVENTS = {"subprocess.Popen", "os.system", "os.fork", "os.forkpty"}
+
+_lock = threading.Lock()
+_spawns: Counter = Counter()
+_installed = False
+
+
+def _audit_hook(event: str, args: tuple):
+    if event not in _SPAWN_EVENTS:
+        return
+    if event == "subprocess.Popen":
+        # args: (executable, args, cwd, env)
+        argv = args[1]
+        if isinstance(argv, (list, tuple)) and argv:
+            name = str(argv[0])
+        else:
+            name = str(argv)
+    elif event == "os.system":
+        name = str(args[0]).split(" ", 1)[0]
+    else:
+        name = event
+    with _lock:
+        _spawns[name] += 1
+
+
+def install():
+    """Start counting spawned processes. Audit hooks can't be removed, so this is a one-shot."""
+    global _installed
+    if _installed:
+        return
+    sys.addaudithook(_audit_hook)
+    _installed = True
+
+
+def spawn_count() -> int:
+    with _lock:
+        return sum(_spawns.values())
+
+
+def spawn_breakdown() -> dict[str, int]:
+    with _lock:
+        return dict(_spawns)
@@ -0,0 +1,109 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# On-disk index of generated thumbnails, keyed by the source's (path, mtime, size).
+# The thumbnail file name is derived from that key too, so an edited image gets
+# a new thumbnail instead of silently reusing the stale one.
+
+INDEX_FILE = "index.sqlite3"
+
+
+class ThumbnailIndex:
+    def __init__(self, cache_dir: str, extension: str = "png"):
+        self.cache_dir = cache_dir
+        self.extension = extension
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, INDEX_FILE),
+            check_same_thread=False,
+            isolation_level=None,  # autocommit, every write is a single statement
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS thumbnails ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " thumb TEXT NOT NULL)"
+        )
+
+    def thumb_path_for(self, path: str, mtime_ns: int, size: int) -> str:
+        key = hashlib.md5(f"{path}\0{mtime_ns}\0{size}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.{self.extension}")
+
+    def entries(self) -> dict[str, str]:
+        """Every indexed source path mapped to its thumbnail, without touching the sources."""
+        with self._lock:
+            rows = self._db.execute("SELECT path, thumb FROM thumbnails").fetchall()
+        return dict(rows)
+
+    def lookup(self, path: str, mtime_ns: int, size: int) -> str | None:
+        """The thumbnail for ``path`` if it is still current and present on disk."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT thumb FROM thumbnails WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (path, mtime_ns, size),
+            ).fetchone()
+        # thumbnails in an older format are regenerated too
+        if row and row[0].endswith(f".{self.extension}") and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def put(self, path: str, mtime_ns: int, size: int, thumb: str):
+        with self._lock:
+            old = self._db.execute(
+                "SELECT thumb FROM thumbnails WHERE path = ?", (path,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO thumbnails (path, mtime_ns, size, thumb) VALUES (?, ?, ?, ?)",
+                (path, mtime_ns, size, thumb),
+            )
+        if old and old[0] != thumb:
+            self._remove_file(old[0])
+
+    def remove(self, path: str):
+        with self._lock:
+            old = self._db.execute(
+                "SELECT thumb FROM thumbnails WHERE path = ?", (path,)
+            ).fetchone()
+            self._db.execute("DELETE FROM thumbnails WHERE path = ?", (path,))
+        if old:
+            self._remove_file(old[0])
+
+    def prune(self, keep: set[str]) -> int:
+        """Drop entries whose source is not in ``keep`` and any unreferenced thumbnail file."""
+        started = time.time()
+        with self._lock:
+            rows = self._db.execute("SELECT path, thumb FROM thumbnails").fetchall()
+            orphans = [path for path, _ in rows if path not in keep]
+            self._db.executemany(
+                "DELETE FROM thumbnails WHERE path = ?", [(path,) for path in orphans]
+            )
+        referenced = {thumb for path, thumb in rows if path in keep}
+        removed = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.startswith(INDEX_FILE) or not entry.is_file():
+                    continue
+                if entry.path in referenced:
+                    continue
+                try:
+                    # anything newer may belong to a thumbnail being generated right now
+                    if entry.stat().st_mtime >= started:
+                        continue
+                except OSError:
+                    continue
+                self._remove_file(entry.path)
+                removed += 1
+        return removed
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# Square wallpaper thumbnails, generated in worker processes so decoding isn't
+# serialized by the GIL. Nothing GTK related is imported here on purpose: this
+# module is all the workers need.
+
+THUMBNAIL_SIZE = 96
+THUMBNAIL_EXTENSION = "jpg"  # gdk-pixbuf reads jpeg out of the box, webp needs an extra loader
+THUMBNAIL_QUALITY = 85
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def make_thumbnail(src: str, dst: str, size: int = THUMBNAIL_SIZE) -> str:
+    """Write a center-cropped ``size`` x ``size`` JPEG thumbnail of ``src`` to ``dst``."""
+    with Image.open(src) as img:
+        # Ask the decoder for a reduced image up front (JPEG DCT scaling: 1/2..1/8),
+        # keeping twice the target so the final resample still has detail to work with.
+        # Formats without reduced decoding ignore this.
+        img.draft("RGB", (size * 2, size * 2))
+        width, height = img.size
+        side = min(width, height)
+        left = (width - side) // 2
+        top = (height - side) // 2
+        thumb = img.crop((left, top, left + side, top + side))
+    if thumb.mode != "RGB":
+        thumb = thumb.convert("RGB")
+    thumb.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    thumb.save(tmp, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    os.replace(tmp, dst)
+    return dst
+
+
+def _ready() -> None:
+    return None
+
+
+def start_pool() -> ProcessPoolExecutor:
+    """Create the shared thumbnail pool and fork its workers, one per core.
+
+    main.py calls this before anything else, while the process is still single
+    threaded: forking once GTK, the Hyprland connection or a thread pool is
+    running could leave a worker holding a lock another thread had taken.
+    Spawn and forkserver aren't an option, both re-import main.py in every
+    worker. With the fork method all workers are launched on the first submit
+    and never again, so waiting for one no-op task starts them all.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+        _pool.submit(_ready).result()
+    return _pool
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared thumbnail pool, see start_pool."""
+    return start_pool()
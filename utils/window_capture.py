@@ -0,0 +1,121 @@
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import gi
+
+gi.require_version("GdkPixbuf", "2.0")
+from gi.repository import GdkPixbuf, GLib
+from loguru import logger
+
+# Downscaled window captures for the overview, cached per window address.
+#
+# A capture is reused while it is younger than ``max_age`` and the window's
+# layout (the ``stamp`` passed in by the caller) hasn't changed; callers can
+# also drop an entry when they know the contents changed. Captures run one at a
+# time on a worker thread, and a window already being captured isn't queued
+# twice, so a burst of window events doesn't pile up grim processes.
+#
+# The command gets the window's global geometry and the scale and must write a
+# PNG to stdout, which is then brought to the size the caller asks for. Anything
+# with that contract works, including a fake that cats a fixed image.
+
+CAPTURE_COMMAND = "grim -s {scale} -g '{x},{y} {width}x{height}' -"
+MAX_AGE = 10.0
+CAPTURE_TIMEOUT = 2.0
+
+
+class WindowCaptureCache:
+    def __init__(
+        self,
+        scale: float,
+        command: str = CAPTURE_COMMAND,
+        max_age: float = MAX_AGE,
+    ):
+        self.scale = scale
+        self.command = command
+        self.max_age = max_age
+        self._entries: dict[str, tuple] = {}  # address -> (stamp, captured at, pixbuf)
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="window-capture")
+
+    def cached(self, address: str, stamp) -> GdkPixbuf.Pixbuf | None:
+        """The last capture of ``address`` if it was taken with the same layout, whatever its age."""
+        with self._lock:
+            entry = self._entries.get(address)
+        if entry and entry[0] == stamp:
+            return entry[2]
+        return None
+
+    def request(
+        self,
+        address: str,
+        geometry: tuple[int, int, int, int],
+        size: tuple[int, int],
+        stamp,
+        callback,
+    ):
+        """Call ``callback(pixbuf)`` on the main loop with a ``size`` capture of the window.
+
+        A fresh cached capture is delivered right away, otherwise one is queued.
+        """
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry and entry[0] == stamp and time.monotonic() - entry[1] < self.max_age:
+                callback(entry[2])
+                return
+            if address in self._pending:
+                return
+            self._pending.add(address)
+        self._executor.submit(self._capture, address, geometry, size, stamp, callback)
+
+    def invalidate(self, address: str):
+        """Force the next request for ``address`` to capture again."""
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry:
+                self._entries[address] = (entry[0], float("-inf"), entry[2])
+
+    def discard(self, address: str):
+        with self._lock:
+            self._entries.pop(address, None)
+
+    def _capture(
+        self,
+        address: str,
+        geometry: tuple[int, int, int, int],
+        size: tuple[int, int],
+        stamp,
+        callback,
+    ):
+        x, y, width, height = geometry
+        try:
+            command = self.command.format(
+                x=int(x), y=int(y), width=int(width), height=int(height), scale=self.scale
+            )
+            result = subprocess.run(
+                shlex.split(command),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=CAPTURE_TIMEOUT,
+                check=True,
+            )
+            loader = GdkPixbuf.PixbufLoader()
+            loader.write(result.stdout)
+            loader.close()
+            pixbuf = loader.get_pixbuf()
+            target = (max(1, int(size[0])), max(1, int(size[1])))
+            if (pixbuf.get_width(), pixbuf.get_height()) != target:
+                pixbuf = pixbuf.scale_simple(*target, GdkPixbuf.InterpType.BILINEAR)
+        except Exception as e:
+            logger.warning(f"[Overview] capture of {address} failed: {e}")
+            with self._lock:
+                self._pending.discard(address)
+            return
+        with self._lock:
+            self._pending.discard(address)
+            self._entries[address] = (stamp, time.monotonic(), pixbuf)
+        GLib.idle_add(callback, pixbuf)
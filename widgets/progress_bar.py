@@ -0,0 +1,85 @@
+import math
+from typing import Literal
+
+import cairo
+import gi
+from fabric.core.service import Property
+from fabric.widgets.widget import Widget
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk  # noqa: E402
+
+
+class ProgressBar(Gtk.DrawingArea, Widget):
+    """A horizontal bar filled to ``value`` percent.
+
+    The track is the widget's own CSS background, the fill is drawn in its CSS
+    ``color``. Setting ``value`` only queues a redraw: no child widgets, no
+    inline styles.
+    """
+
+    @Property(float, "read-write", default_value=0.0)
+    def value(self) -> float:
+        return self._value
+
+    @value.setter
+    def value(self, value: float):
+        value = min(max(float(value), 0.0), 100.0)
+        if value != self._value:
+            self._value = value
+            self.queue_draw()
+
+    def __init__(
+        self,
+        value: float = 0.0,
+        name: str | None = "progress-bar",
+        visible: bool = True,
+        all_visible: bool = False,
+        style: str | None = None,
+        tooltip_text: str | None = None,
+        tooltip_markup: str | None = None,
+        h_align: Literal["fill", "start", "end", "center", "baseline"] | Gtk.Align | None = None,
+        v_align: Literal["fill", "start", "end", "center", "baseline"] | Gtk.Align | None = "center",
+        h_expand: bool = False,
+        v_expand: bool = False,
+        size: tuple[int, int] | None = None,
+        **kwargs,
+    ):
+        Gtk.DrawingArea.__init__(self)
+        Widget.__init__(
+            self,
+            name=name,
+            visible=visible,
+            all_visible=all_visible,
+            style=style,
+            tooltip_text=tooltip_text,
+            tooltip_markup=tooltip_markup,
+            h_align=h_align,
+            v_align=v_align,
+            h_expand=h_expand,
+            v_expand=v_expand,
+            size=size,
+            **kwargs,
+        )
+        self._value = min(max(float(value), 0.0), 100.0)
+        self.connect("draw", self.on_draw)
+
+    def on_draw(self, widget: "ProgressBar", ctx: cairo.Context):
+        width = self.get_allocated_width()
+        height = self.get_allocated_height()
+        style_context = self.get_style_context()
+        Gtk.render_background(style_context, ctx, 0, 0, width, height)
+
+        fill_width = width * self._value / 100
+        if fill_width <= 0:
+            return
+        radius = min(height / 2, fill_width / 2)
+        ctx.new_sub_path()
+        ctx.arc(fill_width - radius, radius, radius, -math.pi / 2, 0)
+        ctx.arc(fill_width - radius, height - radius, radius, 0, math.pi / 2)
+        ctx.arc(radius, height - radius, radius, math.pi / 2, math.pi)
+        ctx.arc(radius, radius, radius, math.pi, 3 * math.pi / 2)
+        ctx.close_path()
+        color = style_context.get_color(self.get_state_flags())
+        ctx.set_source_rgba(color.red, color.green, color.blue, color.alpha)
+        ctx.fill()